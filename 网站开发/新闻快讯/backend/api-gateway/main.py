@@ -1,13 +1,46 @@
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import StreamingResponse, Response
 from pydantic import BaseModel
-from typing import Optional, List
+from typing import Optional, List, Dict
+from contextlib import asynccontextmanager
+from datetime import datetime
+from collections import OrderedDict, deque
+from contextvars import ContextVar
+from concurrent.futures import ProcessPoolExecutor
 import httpx
 import asyncio
+import json
 import os
+import random
+import time
+import pipeline
+import sys
 
-app = FastAPI()
+# 共享的指标采集模块位于 backend/common
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "common"))
+from instrumentation import instrument_app, track_downstream
+import compression
+import etag
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # 应用生命周期内为每个下游服务建立一个复用的连接池
+    for service_name in SERVICE_URLS:
+        _get_client(service_name)
+    if PIPELINE_MODE == "inprocess":
+        _get_pipeline_executor()
+    health_task = asyncio.create_task(_health_loop())
+    try:
+        yield
+    finally:
+        health_task.cancel()
+        await _close_clients()
+        _shutdown_pipeline_executor()
+
+app = FastAPI(lifespan=lifespan)
+instrument_app(app, "gateway")
+app.add_middleware(compression.CompressionMiddleware)
 
 # CORS 配置（支持环境变量覆盖）
 default_origins = [
@@ -31,6 +64,8 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # 允许前端读取校验器，配合 If-None-Match 条件请求
+    expose_headers=["ETag"],
 )
 
 # 微服务地址配置（支持环境变量覆盖）
@@ -43,8 +78,106 @@ SERVICE_URLS = {
     "category": os.getenv("CATEGORY_URL", "http://127.0.0.1:8003"),
 }
 
+# ===== 下游连接池 =====
+# 每个服务一个复用的 AsyncClient：keep-alive、安装 h2 时启用 HTTP/2、按服务配置连接上限与超时。
+# 配置可用环境变量覆盖，例如 GATEWAY_NEWS_MAX_CONNECTIONS=50、GATEWAY_COLLECTOR_TIMEOUT=60。
+try:
+    import h2  # noqa: F401  httpx 的 HTTP/2 支持依赖 h2（pip install httpx[http2]）
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+DEFAULT_POOL_CONFIG = {
+    "max_connections": 20,
+    "max_keepalive_connections": 10,
+    "keepalive_expiry": 30.0,
+    "connect_timeout": 5.0,
+    "timeout": 30.0,
+}
+# 采集需要等待外部站点响应，读超时更长；其余服务沿用默认值
+SERVICE_POOL_CONFIG = {
+    "collector": {"timeout": 30.0, "max_connections": 10},
+    "parser": {"timeout": 15.0},
+    "cleaner": {"timeout": 10.0},
+    "news": {"timeout": 10.0, "max_connections": 50, "max_keepalive_connections": 20},
+    "category": {"timeout": 10.0},
+}
+
+# 长耗时的写入型路由：导入逐条调用翻译接口（每次最长 10 秒）、评分逐条调用大模型（每次最长 20 秒），
+# 远超读接口的超时。按下游路径前缀单独设置读超时，且不受 GATEWAY_REQUEST_DEADLINE_SECONDS 限制。
+# 这些路由即使是 GET 也会写数据：不重试、不对冲（否则同一次导入会并发跑多遍），也不计入熔断器（慢导入超时不应让该服务的读接口被熔断）。
+LONG_WRITE_ROUTES = {
+    ("news", "/import/"): float(os.getenv("GATEWAY_NEWS_IMPORT_TIMEOUT", "300")),
+    ("news", "/rescore"): float(os.getenv("GATEWAY_NEWS_RESCORE_TIMEOUT", "600")),
+    ("news", "/score/"): float(os.getenv("GATEWAY_NEWS_SCORE_TIMEOUT", "60")),
+}
+
+def _long_route_timeout(service_name: str, endpoint: str) -> Optional[float]:
+    """长耗时写入型路由的读超时；其他路由返回 None"""
+    for (service, prefix), timeout in LONG_WRITE_ROUTES.items():
+        if service == service_name and endpoint.startswith(prefix):
+            return timeout
+    return None
+
+def _pool_config(service_name: str) -> dict:
+    config = {**DEFAULT_POOL_CONFIG, **SERVICE_POOL_CONFIG.get(service_name, {})}
+    for key, default in config.items():
+        env = os.getenv(f"GATEWAY_{service_name.upper()}_{key.upper()}")
+        if env:
+            config[key] = type(default)(env)
+    return config
+
+service_clients: Dict[str, httpx.AsyncClient] = {}
+# 每个服务的调用计数：请求数、错误数、进行中请求数、累计耗时
+pool_stats: Dict[str, Dict[str, float]] = {}
+
+def _get_client(service_name: str) -> httpx.AsyncClient:
+    """获取服务对应的复用客户端；未经 lifespan 创建时按需创建"""
+    client = service_clients.get(service_name)
+    if client is None or client.is_closed:
+        config = _pool_config(service_name)
+        client = httpx.AsyncClient(
+            follow_redirects=True,
+            http2=HTTP2_AVAILABLE,
+            limits=httpx.Limits(
+                max_connections=config["max_connections"],
+                max_keepalive_connections=config["max_keepalive_connections"],
+                keepalive_expiry=config["keepalive_expiry"],
+            ),
+            timeout=httpx.Timeout(config["timeout"], connect=config["connect_timeout"]),
+        )
+        service_clients[service_name] = client
+        pool_stats.setdefault(service_name, {"requests": 0, "errors": 0, "in_flight": 0, "total_ms": 0.0})
+    return client
+
+async def _close_clients():
+    for client in service_clients.values():
+        await client.aclose()
+    service_clients.clear()
+
+def _pool_connections(client: httpx.AsyncClient) -> dict:
+    """读取 httpcore 连接池中的连接状态（内部属性，取不到时返回空）"""
+    pool = getattr(getattr(client, "_transport", None), "_pool", None)
+    connections = list(getattr(pool, "connections", []) or [])
+    summary = {"open": len(connections), "idle": 0, "http2": 0}
+    for conn in connections:
+        try:
+            if conn.is_idle():
+                summary["idle"] += 1
+            if "HTTP/2" in conn.info():
+                summary["http2"] += 1
+        except Exception:
+            continue
+    return summary
+
 class CollectRequest(BaseModel):
     url: str
+    # 为 True 时采集服务不做未变化比对，始终返回正文
+    force: bool = False
+
+class BatchCollectRequest(BaseModel):
+    urls: List[str]
+    force: bool = False
 
 class ParseRequest(BaseModel):
     content: str
@@ -59,74 +192,706 @@ class NewsItem(BaseModel):
     source: str
     url: str
 
-async def call_service(service_name: str, endpoint: str, method: str = "GET", data: dict = None, params: dict = None):
-    """调用其他微服务的通用函数"""
+# ===== 容错：熔断、重试、对冲请求、截止时间 =====
+# 每个服务一个熔断器：连续失败达到阈值后打开，冷却期内直接拒绝；冷却结束进入半开状态，只放行一个探测请求，
+# 探测成功则关闭，失败则重新打开。连接错误与 5xx 计为失败，4xx 说明服务仍在正常应答，不计入。
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("GATEWAY_BREAKER_FAILURES", "5"))
+BREAKER_RESET_SECONDS = float(os.getenv("GATEWAY_BREAKER_RESET_SECONDS", "30"))
+# 仅幂等的 GET 重试：指数退避 + 全抖动，最多重试 GATEWAY_RETRY_ATTEMPTS 次；写数据的 GET（LONG_WRITE_ROUTES）不重试
+RETRY_ATTEMPTS = int(os.getenv("GATEWAY_RETRY_ATTEMPTS", "2"))
+RETRY_BASE_DELAY = float(os.getenv("GATEWAY_RETRY_BASE_DELAY", "0.1"))
+RETRY_MAX_DELAY = float(os.getenv("GATEWAY_RETRY_MAX_DELAY", "2.0"))
+RETRYABLE_STATUS = {502, 503, 504}
+# 对冲请求（默认关闭）：GET 超过该服务近期 p95 耗时仍未返回时再发一份，取先成功者
+HEDGE_ENABLED = os.getenv("GATEWAY_HEDGE_ENABLED", "false").lower() in ("1", "true", "yes")
+HEDGE_QUANTILE = float(os.getenv("GATEWAY_HEDGE_QUANTILE", "0.95"))
+HEDGE_MIN_DELAY = float(os.getenv("GATEWAY_HEDGE_MIN_DELAY", "0.05"))
+HEDGE_MIN_SAMPLES = int(os.getenv("GATEWAY_HEDGE_MIN_SAMPLES", "20"))
+# 每个入站请求的总时限；剩余时间（毫秒）通过请求头传给下游，入站请求自带该头时取较小值
+REQUEST_DEADLINE_SECONDS = float(os.getenv("GATEWAY_REQUEST_DEADLINE_SECONDS", "30"))
+DEADLINE_HEADER = "X-Request-Deadline-Ms"
+
+_request_deadline: ContextVar[Optional[float]] = ContextVar("gateway_request_deadline", default=None)
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probing = False
+        self.stats = {"opened": 0, "rejected": 0}
+
+    def allow(self) -> bool:
+        if self.state == "open":
+            if time.monotonic() - self.opened_at < self.reset_seconds:
+                self.stats["rejected"] += 1
+                return False
+            self.state = "half_open"
+            self.probing = False
+        if self.state == "half_open":
+            if self.probing:
+                self.stats["rejected"] += 1
+                return False
+            self.probing = True
+        return True
+
+    def record_success(self):
+        self.state = "closed"
+        self.failures = 0
+        self.probing = False
+
+    def record_failure(self):
+        self.failures += 1
+        self.probing = False
+        if self.state == "half_open" or self.failures >= self.failure_threshold:
+            if self.state != "open":
+                self.stats["opened"] += 1
+            self.state = "open"
+            self.opened_at = time.monotonic()
+
+    def release(self):
+        """请求被取消、结果未知时归还半开探测名额"""
+        self.probing = False
+
+    def retry_after(self) -> float:
+        return max(0.0, self.reset_seconds - (time.monotonic() - self.opened_at))
+
+    def snapshot(self) -> dict:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "retry_after_seconds": round(self.retry_after(), 3) if self.state == "open" else 0.0,
+            **self.stats,
+        }
+
+breakers: Dict[str, CircuitBreaker] = {}
+# 每个服务的容错统计与近期成功 GET 的耗时样本（用于估算对冲延迟）
+resilience_stats: Dict[str, Dict[str, int]] = {}
+_latency_samples: Dict[str, deque] = {}
+
+def _breaker(service_name: str) -> CircuitBreaker:
+    breaker = breakers.get(service_name)
+    if breaker is None:
+        breaker = breakers[service_name] = CircuitBreaker(BREAKER_FAILURE_THRESHOLD, BREAKER_RESET_SECONDS)
+        resilience_stats[service_name] = {"retries": 0, "hedged": 0, "hedge_wins": 0, "deadline_exceeded": 0}
+        _latency_samples[service_name] = deque(maxlen=200)
+    return breaker
+
+def _attempt_timeout(service_name: str, route_timeout: Optional[float] = None) -> httpx.Timeout:
+    """单次尝试的超时：服务配置的超时与本请求剩余时间取较小值；已超时则直接返回 504。
+    长耗时写入型路由使用 route_timeout，不受请求截止时间限制。
+    """
+    config = _pool_config(service_name)
+    if route_timeout is not None:
+        return httpx.Timeout(route_timeout, connect=config["connect_timeout"])
+    timeout = config["timeout"]
+    deadline = _request_deadline.get()
+    if deadline is not None:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            resilience_stats[service_name]["deadline_exceeded"] += 1
+            raise HTTPException(status_code=504, detail=f"Service {service_name} call skipped: request deadline exceeded")
+        timeout = min(timeout, remaining)
+    return httpx.Timeout(timeout, connect=min(config["connect_timeout"], timeout))
+
+def _deadline_headers(headers: Optional[dict]) -> Optional[dict]:
+    deadline = _request_deadline.get()
+    if deadline is None:
+        return headers
+    remaining_ms = max(0, int((deadline - time.monotonic()) * 1000))
+    return {**(headers or {}), DEADLINE_HEADER: str(remaining_ms)}
+
+def _hedge_delay(service_name: str) -> Optional[float]:
+    samples = _latency_samples[service_name]
+    if not HEDGE_ENABLED or len(samples) < HEDGE_MIN_SAMPLES:
+        return None
+    ordered = sorted(samples)
+    return max(HEDGE_MIN_DELAY, ordered[min(len(ordered) - 1, int(len(ordered) * HEDGE_QUANTILE))])
+
+async def _hedged_get(service_name: str, client: httpx.AsyncClient, url: str, params: Optional[dict], headers: Optional[dict], timeout: httpx.Timeout) -> httpx.Response:
+    """GET，必要时在 p95 延迟后发出对冲请求，返回先成功的响应并取消另一份"""
+    delay = _hedge_delay(service_name)
+    if delay is None:
+        return await client.get(url, params=params, headers=headers, timeout=timeout)
+    primary = asyncio.ensure_future(client.get(url, params=params, headers=headers, timeout=timeout))
+    done, _ = await asyncio.wait({primary}, timeout=delay)
+    if done:
+        return primary.result()
+    stats = resilience_stats[service_name]
+    stats["hedged"] += 1
+    hedge = asyncio.ensure_future(client.get(url, params=params, headers=headers, timeout=timeout))
+    pending = {primary, hedge}
+    error = None
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    if task is hedge:
+                        stats["hedge_wins"] += 1
+                    return task.result()
+                error = task.exception()
+        raise error
+    finally:
+        for task in pending:
+            task.cancel()
+
+class DeadlineMiddleware:
+    """为每个入站请求设置截止时间，下游调用据此收紧超时并透传剩余时间"""
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or REQUEST_DEADLINE_SECONDS <= 0:
+            return await self.app(scope, receive, send)
+        budget = REQUEST_DEADLINE_SECONDS
+        for name, value in scope["headers"]:
+            if name == DEADLINE_HEADER.lower().encode():
+                try:
+                    budget = min(budget, int(value) / 1000)
+                except ValueError:
+                    pass
+        token = _request_deadline.set(time.monotonic() + budget)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _request_deadline.reset(token)
+
+app.add_middleware(DeadlineMiddleware)
+
+# ===== 请求合并（single-flight） =====
+# 相同的并发 GET（服务、路径、参数、条件请求头都相同）只向下游发一次，结果或异常分发给所有等待者。
+# 下游请求在独立任务中执行，发起者断开连接不会取消其他等待者共享的请求。
+_inflight: Dict[tuple, asyncio.Task] = {}
+singleflight_stats = {"upstream": 0, "coalesced": 0, "shared_errors": 0}
+
+def _singleflight_key(service_name: str, endpoint: str, params: Optional[dict], headers: Optional[dict]) -> tuple:
+    return (
+        service_name,
+        endpoint,
+        tuple(sorted((k, str(v)) for k, v in (params or {}).items())),
+        tuple(sorted((k.lower(), v) for k, v in (headers or {}).items())),
+    )
+
+def _finish_flight(key: tuple, task: asyncio.Task) -> None:
+    if _inflight.get(key) is task:
+        del _inflight[key]
+    # 取走异常，避免无人等待时出现 “exception was never retrieved” 警告
+    if not task.cancelled():
+        task.exception()
+
+async def _singleflight_get(service_name: str, endpoint: str, params: Optional[dict], headers: Optional[dict]) -> httpx.Response:
+    key = _singleflight_key(service_name, endpoint, params, headers)
+    task = _inflight.get(key)
+    coalesced = task is not None
+    if coalesced:
+        singleflight_stats["coalesced"] += 1
+    else:
+        singleflight_stats["upstream"] += 1
+        task = asyncio.ensure_future(_send_request(service_name, endpoint, "GET", params=params, headers=headers))
+        _inflight[key] = task
+        task.add_done_callback(lambda t: _finish_flight(key, t))
+    try:
+        return await asyncio.shield(task)
+    except HTTPException:
+        if coalesced:
+            singleflight_stats["shared_errors"] += 1
+        raise
+
+async def _request_service(service_name: str, endpoint: str, method: str = "GET", data: dict = None, params: dict = None, headers: dict = None, content: bytes = None) -> httpx.Response:
+    """调用其他微服务并返回原始响应；304 视为成功，其余非 2xx 转换为 HTTPException"""
+    if method == "GET":
+        return await _singleflight_get(service_name, endpoint, params, headers)
+    return await _send_request(service_name, endpoint, method, data=data, params=params, headers=headers, content=content)
+
+async def _send_request(service_name: str, endpoint: str, method: str = "GET", data: dict = None, params: dict = None, headers: dict = None, content=None, stream: bool = False) -> httpx.Response:
+    """发送下游请求（熔断、重试、截止时间）。stream=True 时以字节流收发，状态码原样返回，由调用方关闭响应"""
     base_url = SERVICE_URLS.get(service_name)
     if not base_url:
         raise HTTPException(status_code=500, detail=f"Service {service_name} not configured")
     
     url = f"{base_url}{endpoint}"
     
-    async with httpx.AsyncClient(follow_redirects=True) as client:
+    client = _get_client(service_name)
+    breaker = _breaker(service_name)
+    stats = pool_stats[service_name]
+    route_timeout = _long_route_timeout(service_name, endpoint)
+    # 写数据的长耗时路由：只发一次，不经过熔断器
+    idempotent = method == "GET" and route_timeout is None
+    attempts = 1 + RETRY_ATTEMPTS if idempotent else 1
+    for attempt in range(attempts):
+        if route_timeout is None and not breaker.allow():
+            raise HTTPException(
+                status_code=503,
+                detail=f"Service {service_name} unavailable: circuit open",
+                headers={"Retry-After": str(max(1, int(breaker.retry_after() + 0.5)))},
+            )
+        timeout = _attempt_timeout(service_name, route_timeout)
+        # 长耗时路由不受截止时间限制，也就不向下游传剩余时间
+        send_headers = headers if route_timeout is not None else _deadline_headers(headers)
+        stats["requests"] += 1
+        stats["in_flight"] += 1
+        started = time.perf_counter()
+        error = None
+        with track_downstream(service_name) as tracker:
+            try:
+                if stream:
+                    upstream_request = client.build_request(method, url, params=params, content=content, headers=send_headers, timeout=timeout)
+                    response = await client.send(upstream_request, stream=True)
+                elif idempotent:
+                    response = await _hedged_get(service_name, client, url, params, send_headers, timeout)
+                else:
+                    response = await client.request(method, url, params=params, json=data, content=content, headers=send_headers, timeout=timeout)
+                if method != "GET" or route_timeout is not None:
+                    # 写操作（包括导入这类写数据的 GET）之后该服务的缓存响应不再可信
+                    response_cache.invalidate_service(service_name)
+            except httpx.RequestError as e:
+                error = e
+            except BaseException:
+                if route_timeout is None:
+                    breaker.release()
+                raise
+            finally:
+                stats["in_flight"] -= 1
+                elapsed = time.perf_counter() - started
+                stats["total_ms"] += elapsed * 1000
+            if error is not None or response.status_code >= 500:
+                tracker.outcome = "error"
+
+        if error is None and response.status_code < 500:
+            if route_timeout is None:
+                breaker.record_success()
+            if method == "GET" and response.status_code < 400:
+                _latency_samples[service_name].append(elapsed)
+            if response.status_code >= 400:
+                stats["errors"] += 1
+                if not stream:
+                    raise HTTPException(status_code=response.status_code, detail=f"Service {service_name} error: {response.text}")
+            return response
+
+        if route_timeout is None:
+            breaker.record_failure()
+        stats["errors"] += 1
+        retryable = error is not None or response.status_code in RETRYABLE_STATUS
+        if attempt + 1 < attempts and retryable:
+            backoff = random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempt))
+            deadline = _request_deadline.get()
+            if deadline is None or time.monotonic() + backoff < deadline:
+                resilience_stats[service_name]["retries"] += 1
+                if stream and error is None:
+                    await response.aclose()
+                await asyncio.sleep(backoff)
+                continue
+        if error is not None:
+            raise HTTPException(status_code=503, detail=f"Service {service_name} unavailable: {str(error)}")
+        if stream:
+            return response
+        raise HTTPException(status_code=response.status_code, detail=f"Service {service_name} error: {response.text}")
+
+# compress=True 的请求体（整页 HTML 等）按 GATEWAY_PAYLOAD_ENCODING 压缩后发送，由下游 CompressionMiddleware 解压；置空关闭
+PAYLOAD_ENCODING = os.getenv("GATEWAY_PAYLOAD_ENCODING", "gzip")
+
+async def call_service(service_name: str, endpoint: str, method: str = "GET", data: dict = None, params: dict = None, compress: bool = False):
+    """调用其他微服务的通用函数"""
+    headers = None
+    content = None
+    if compress and PAYLOAD_ENCODING and data is not None:
+        body = json.dumps(data, ensure_ascii=False).encode()
+        if len(body) >= compression.MIN_SIZE:
+            content = compression.compress(body, PAYLOAD_ENCODING)
+            headers = {"content-type": "application/json", "content-encoding": PAYLOAD_ENCODING}
+            data = None
+    response = await _request_service(service_name, endpoint, method, data=data, params=params, headers=headers, content=content)
+    return response.json()
+
+# 条件请求相关头：请求方向透传 If-None-Match，响应方向透传校验器
+CONDITIONAL_REQUEST_HEADERS = ("if-none-match", "if-modified-since")
+VALIDATOR_HEADERS = ("etag", "last-modified", "cache-control")
+
+async def proxy_get(service_name: str, endpoint: str, request: Request, params: dict = None):
+    """GET 代理：透传条件请求与校验器，下游返回 304 时网关同样返回 304"""
+    ttl = CACHE_TTLS.get(request.url.path, 0)
+    if ttl > 0:
+        return await _cached_get(service_name, endpoint, request, params, ttl)
+    return await stream_proxy(service_name, endpoint, request, params=params)
+
+# 直通代理：请求体与响应体均按字节流转发，不解析也不重新序列化 JSON；状态码、ETag、Content-Encoding 原样返回
+PROXY_REQUEST_HEADERS = ("content-type", "content-length", "content-encoding", "accept", "accept-encoding") + CONDITIONAL_REQUEST_HEADERS + ("if-match",)
+PROXY_RESPONSE_HEADERS = ("content-type", "content-length", "content-encoding", "vary", "retry-after") + VALIDATOR_HEADERS
+
+async def stream_proxy(service_name: str, endpoint: str, request: Request, params: dict = None):
+    headers = {k: request.headers[k] for k in PROXY_REQUEST_HEADERS if k in request.headers}
+    # 客户端未声明 Accept-Encoding 时要求下游不压缩，否则 httpx 默认的 gzip 会被原样转给客户端
+    headers.setdefault("accept-encoding", "identity")
+    content = request.stream() if request.method in ("POST", "PUT", "PATCH") else None
+    upstream = await _send_request(service_name, endpoint, request.method, params=params, headers=headers, content=content, stream=True)
+
+    async def relay():
         try:
-            if method == "GET":
-                response = await client.get(url, params=params, timeout=30.0)
-            else:
-                response = await client.post(url, json=data, timeout=30.0)
-            
-            response.raise_for_status()
-            return response.json()
-            
-        except httpx.RequestError as e:
-            raise HTTPException(status_code=503, detail=f"Service {service_name} unavailable: {str(e)}")
-        except httpx.HTTPStatusError as e:
-            raise HTTPException(status_code=e.response.status_code, detail=f"Service {service_name} error: {e.response.text}")
+            async for chunk in upstream.aiter_raw():
+                yield chunk
+        finally:
+            await upstream.aclose()
+
+    response_headers = {k: upstream.headers[k] for k in PROXY_RESPONSE_HEADERS if k in upstream.headers}
+    return StreamingResponse(relay(), status_code=upstream.status_code, headers=response_headers)
+
+# ===== 响应缓存 =====
+# 数据只在调度导入时变化，读路由的响应按 (网关路径, 规范化查询) 缓存在网关内存中：
+# - 各路由 TTL 可配置（GATEWAY_CACHE_TTLS="/news=15,/news/top=30"，0 表示不缓存）；
+# - 过期后 GATEWAY_CACHE_STALE_SECONDS 秒内先返回旧响应并在后台刷新（stale-while-revalidate），
+#   刷新失败时继续使用旧响应；
+# - 按响应体字节数设上限（GATEWAY_CACHE_MAX_BYTES），超出时按 LRU 淘汰；
+# - 网关代理到某服务的 POST/PUT/DELETE 以及导入等写数据的 GET（LONG_WRITE_ROUTES）会清空该服务的全部缓存。
+DEFAULT_CACHE_TTLS = {
+    "/news": 15.0,
+    "/news/top": 30.0,
+    "/categories": 300.0,
+    "/categories/tree": 300.0,
+}
+
+def _parse_cache_ttls(raw: str) -> Dict[str, float]:
+    ttls = dict(DEFAULT_CACHE_TTLS)
+    for item in raw.split(","):
+        path, _, seconds = item.partition("=")
+        if path.strip() and seconds.strip():
+            ttls[path.strip()] = float(seconds)
+    return ttls
+
+CACHE_TTLS = _parse_cache_ttls(os.getenv("GATEWAY_CACHE_TTLS", ""))
+CACHE_STALE_SECONDS = float(os.getenv("GATEWAY_CACHE_STALE_SECONDS", "60"))
+CACHE_MAX_BYTES = int(os.getenv("GATEWAY_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+
+class ResponseCache:
+    """LRU 响应缓存，按缓存的响应体总字节数限制容量"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.entries: "OrderedDict[tuple, dict]" = OrderedDict()
+        self.bytes = 0
+        # 每个服务的失效代数：刷新开始后发生过失效，则丢弃刷新结果
+        self.generations: Dict[str, int] = {}
+        self.stats = {"hits": 0, "misses": 0, "stale": 0, "evictions": 0, "invalidations": 0}
+
+    def get(self, key: tuple) -> Optional[dict]:
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+        return entry
+
+    def put(self, key: tuple, entry: dict, generation: int) -> None:
+        if generation != self.generations.get(entry["service"], 0) or entry["size"] > self.max_bytes:
+            return
+        self.discard(key)
+        self.entries[key] = entry
+        self.bytes += entry["size"]
+        while self.bytes > self.max_bytes:
+            _, evicted = self.entries.popitem(last=False)
+            self.bytes -= evicted["size"]
+            self.stats["evictions"] += 1
+
+    def discard(self, key: tuple) -> None:
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.bytes -= entry["size"]
+
+    def generation(self, service_name: str) -> int:
+        return self.generations.get(service_name, 0)
+
+    def invalidate_service(self, service_name: str) -> None:
+        self.generations[service_name] = self.generation(service_name) + 1
+        for key in [k for k, e in self.entries.items() if e["service"] == service_name]:
+            self.discard(key)
+        self.stats["invalidations"] += 1
+
+response_cache = ResponseCache(CACHE_MAX_BYTES)
+# 正在后台刷新的缓存键，以及刷新任务的引用（防止任务被回收）
+_refreshing: set = set()
+_background_tasks: set = set()
+
+def _cache_key(path: str, params: Optional[dict]) -> tuple:
+    return (path, tuple(sorted((k, str(v)) for k, v in (params or {}).items())))
+
+async def _fetch_into_cache(service_name: str, endpoint: str, params: Optional[dict], key: tuple, previous: Optional[dict]) -> dict:
+    """从下游拉取并写入缓存；已有缓存时带 If-None-Match 重新验证，304 只刷新时间"""
+    generation = response_cache.generation(service_name)
+    headers = {}
+    if previous and previous["headers"].get("etag"):
+        headers["if-none-match"] = previous["headers"]["etag"]
+    response = await _request_service(service_name, endpoint, "GET", params=params, headers=headers)
+    if response.status_code == 304 and previous:
+        entry = {**previous, "stored_at": time.monotonic()}
+    else:
+        body = response.content
+        entry = {
+            "service": service_name,
+            "body": body,
+            "headers": {k: response.headers[k] for k in VALIDATOR_HEADERS if k in response.headers},
+            "stored_at": time.monotonic(),
+            "size": len(body),
+        }
+    response_cache.put(key, entry, generation)
+    return entry
+
+def _schedule_refresh(service_name: str, endpoint: str, params: Optional[dict], key: tuple, previous: dict) -> None:
+    if key in _refreshing:
+        return
+    _refreshing.add(key)
+
+    async def refresh():
+        try:
+            await _fetch_into_cache(service_name, endpoint, params, key, previous)
+        except Exception:
+            # 刷新失败保留旧响应，下次请求再试
+            pass
+        finally:
+            _refreshing.discard(key)
+
+    task = asyncio.create_task(refresh())
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+def _cached_response(entry: dict, request: Request, state: str) -> Response:
+    # 同一 URL 按 Accept-Encoding 返回不同的响应体，未压缩的响应同样要声明 Vary，避免下游共享缓存混用
+    headers = {
+        **entry["headers"],
+        "X-Cache": state,
+        "Age": str(int(time.monotonic() - entry["stored_at"])),
+        "Vary": "Accept-Encoding",
+    }
+    cached_etag = entry["headers"].get("etag")
+    # 弱比较：压缩中间件会把 ETag 降为 W/，客户端也可能发送多个 ETag 或 *
+    if cached_etag and etag.etag_matches(request, cached_etag):
+        return Response(status_code=304, headers=headers)
+    encoding = compression.choose_encoding(request.headers.get("accept-encoding"))
+    if encoding and entry["size"] >= compression.MIN_SIZE:
+        # 每种编码只压缩一次，随缓存条目保存（压缩副本远小于原文，不计入缓存容量）
+        encoded = entry.setdefault("encoded", {})
+        if encoding not in encoded:
+            encoded[encoding] = compression.compress(entry["body"], encoding)
+        headers["Content-Encoding"] = encoding
+        return Response(content=encoded[encoding], media_type="application/json", headers=headers)
+    return Response(content=entry["body"], media_type="application/json", headers=headers)
+
+async def _cached_get(service_name: str, endpoint: str, request: Request, params: Optional[dict], ttl: float) -> Response:
+    key = _cache_key(request.url.path, params)
+    entry = response_cache.get(key)
+    if entry is not None:
+        age = time.monotonic() - entry["stored_at"]
+        if age <= ttl:
+            response_cache.stats["hits"] += 1
+            return _cached_response(entry, request, "HIT")
+        if age <= ttl + CACHE_STALE_SECONDS:
+            response_cache.stats["stale"] += 1
+            _schedule_refresh(service_name, endpoint, params, key, entry)
+            return _cached_response(entry, request, "STALE")
+
+    response_cache.stats["misses"] += 1
+    try:
+        fresh = await _fetch_into_cache(service_name, endpoint, params, key, entry)
+    except HTTPException:
+        # 下游不可用时退回到过期的缓存（stale-if-error）
+        if entry is None:
+            raise
+        return _cached_response(entry, request, "STALE")
+    return _cached_response(fresh, request, "MISS")
 
 @app.get("/")
 def read_root():
     return {"message": "News Processing API Gateway", "version": "1.0.0"}
 
+# ===== 流水线模式 =====
+# http：经各微服务接口处理（默认）；inprocess：网关直接调用各服务的处理函数，解析放到进程池执行
+PIPELINE_MODE = os.getenv("GATEWAY_PIPELINE_MODE", "http").lower()
+PIPELINE_WORKERS = int(os.getenv("GATEWAY_PIPELINE_WORKERS", str(os.cpu_count() or 2)))
+_pipeline_executor: Optional[ProcessPoolExecutor] = None
+
+def _get_pipeline_executor() -> ProcessPoolExecutor:
+    global _pipeline_executor
+    if _pipeline_executor is None:
+        _pipeline_executor = ProcessPoolExecutor(max_workers=PIPELINE_WORKERS, initializer=pipeline.init_worker)
+    return _pipeline_executor
+
+def _shutdown_pipeline_executor():
+    global _pipeline_executor
+    if _pipeline_executor is not None:
+        _pipeline_executor.shutdown(wait=False, cancel_futures=True)
+        _pipeline_executor = None
+
+# 进程内阶段的指标沿用对应服务名作为下游目标，便于与 HTTP 模式对比
+PIPELINE_STAGE_TARGETS = {"collect": "collector", "parse": "parser", "clean": "cleaner"}
+
+async def _run_inprocess(stage: str, func, *args):
+    """执行进程内阶段；异常按对应服务出错处理，与 HTTP 模式保持一致"""
+    try:
+        with track_downstream(PIPELINE_STAGE_TARGETS[stage]):
+            if stage == "parse":
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(_get_pipeline_executor(), func, *args)
+            if asyncio.iscoroutinefunction(func):
+                return await func(*args)
+            return await asyncio.to_thread(func, *args)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Service {stage} error: {str(e)}")
+
+# 页面在采集与解析之间以原始字节传递（body + encoding），只在解析时解码一次，不经 JSON 转义。
+# 采集服务的"未变化"校验信息在入库成功后才由 commit_collected 确认，中途失败的页面下次仍会完整处理。
+async def collect_stage(url: str, force: bool = False) -> dict:
+    if PIPELINE_MODE == "inprocess":
+        return await _run_inprocess("collect", pipeline.collect, url, force)
+    params = {"url": url, "commit": "false"}
+    if force:
+        params["force"] = "true"
+    try:
+        response = await _request_service("collector", "/collect/raw", "GET", params=params)
+    except HTTPException as e:
+        if e.status_code == 424:
+            # 目标页面抓取失败（采集服务本身正常）
+            return {"success": False, "error": e.detail, "url": url}
+        raise
+    if response.headers.get("x-unchanged"):
+        return {"success": True, "unchanged": True, "reason": response.headers["x-unchanged"], "url": url}
+    return {
+        "success": True,
+        "unchanged": False,
+        "url": url,
+        "body": response.content,
+        "encoding": response.headers.get("x-content-charset"),
+        "digest": response.headers.get("x-content-digest"),
+    }
+
+async def commit_collected(collect_results: List[dict]) -> None:
+    """入库成功（或无需入库）后确认采集结果；确认失败只会让这些页面下次被重新处理"""
+    items = [{"url": r["url"], "digest": r["digest"]} for r in collect_results if r.get("digest")]
+    if not items:
+        return
+    try:
+        if PIPELINE_MODE == "inprocess":
+            pipeline.commit(items)
+        else:
+            await call_service("collector", "/collect/commit", "POST", data=items)
+    except HTTPException:
+        pass
+
+async def parse_stage(collect_result: dict, source_url: str) -> dict:
+    body = collect_result.get("body", b"")
+    encoding = collect_result.get("encoding")
+    if PIPELINE_MODE == "inprocess":
+        return await _run_inprocess("parse", pipeline.parse, body, encoding, source_url)
+    params = {"source_url": source_url, "content_type": "html"}
+    if encoding:
+        params["encoding"] = encoding
+    content, headers = _raw_payload(body)
+    response = await _request_service("parser", "/parse/raw", "POST", params=params, headers=headers, content=content)
+    return response.json()
+
+def _raw_payload(body: bytes):
+    """原始页面字节作为请求体；较大时按 PAYLOAD_ENCODING 压缩"""
+    headers = {"content-type": "application/octet-stream"}
+    if PAYLOAD_ENCODING and len(body) >= compression.MIN_SIZE:
+        body = compression.compress(body, PAYLOAD_ENCODING)
+        headers["content-encoding"] = PAYLOAD_ENCODING
+    return body, headers
+
+# ===== 订阅源 =====
+# 采集到的是 RSS/Atom 时按订阅源处理（识别见 pipeline.is_feed）：解析服务一次返回全部条目，逐条清洗后批量入库，一次抓取得到 N 条新闻。
+
+async def parse_feed_stage(collect_result: dict, source_url: str) -> List[dict]:
+    body = collect_result.get("body", b"")
+    encoding = collect_result.get("encoding")
+    if PIPELINE_MODE == "inprocess":
+        return await _run_inprocess("parse", pipeline.parse_feed, body, encoding, source_url)
+    params = {"source_url": source_url}
+    if encoding:
+        params["encoding"] = encoding
+    content, headers = _raw_payload(body)
+    response = await _request_service("parser", "/parse/feed", "POST", params=params, headers=headers, content=content)
+    return response.json()["entries"]
+
+async def clean_entries_stage(entries: List[dict]) -> List[dict]:
+    """全部条目一次交给清洗服务 /clean/batch，不再逐条请求 /clean"""
+    if not entries:
+        return []
+    if PIPELINE_MODE == "inprocess":
+        return await _run_inprocess("clean", pipeline.clean_batch, entries)
+    return await call_service("cleaner", "/clean/batch", "POST", data=entries, compress=True)
+
+async def save_items(items: List[dict]) -> List[dict]:
+    """经 news-service:/news/bulk 一次写入，返回实际创建的条目（URL 已存在的被跳过）"""
+    if not items:
+        return []
+    bulk = await call_service("news", "/news/bulk", "POST", data=[_create_payload(item) for item in items])
+    return bulk.get("created", [])
+
+async def _process_feed(collect_result: dict, url: str) -> dict:
+    entries = await parse_feed_stage(collect_result, url)
+    clean_results = await clean_entries_stage(entries)
+    to_save = [r["cleaned_item"] for r in clean_results if not r.get("is_duplicate") and r.get("cleaned_item")]
+    try:
+        created = await save_items(to_save)
+        await commit_collected([collect_result])
+    except Exception:
+        # 入库失败不影响处理流程结果返回
+        created = []
+    return {
+        "success": True,
+        "unchanged": False,
+        "feed": True,
+        "entries": len(entries),
+        "data": clean_results,
+        "saved": bool(created),
+        "saved_count": len(created),
+        "saved_item": None,
+        "processing_steps": ["collect", "parse", "clean", "save"]
+    }
+
+async def clean_stage(parse_result: dict) -> dict:
+    if PIPELINE_MODE == "inprocess":
+        return await _run_inprocess("clean", pipeline.clean, parse_result)
+    return await call_service("cleaner", "/clean", "POST", data=parse_result)
+
 @app.post("/process-news")
 async def process_news(request: CollectRequest):
     """完整的新闻处理流程：收集 -> 解析 -> 清洗"""
     try:
         # 1. 收集数据
-        collect_result = await call_service("collector", "/collect", "GET", params={"url": request.url})
+        collect_result = await collect_stage(request.url, request.force)
         
         if not collect_result.get("success"):
             raise HTTPException(status_code=400, detail="Failed to collect data")
         
-        html_content = collect_result.get("content", "")
+        # 页面自上次采集以来未变化：跳过解析、清洗与入库
+        if collect_result.get("unchanged"):
+            return {
+                "success": True,
+                "unchanged": True,
+                "data": None,
+                "saved": False,
+                "saved_item": None,
+                "processing_steps": ["collect"]
+            }
+        
+        # RSS/Atom：解析出全部条目并批量入库
+        if pipeline.is_feed(collect_result.get("body", b"")):
+            return await _process_feed(collect_result, request.url)
         
         # 2. 解析数据
-        parse_data = {
-            "content": html_content,
-            "content_type": "html",
-            "source_url": request.url
-        }
-        parse_result = await call_service("parser", "/parse", "POST", data=parse_data)
+        parse_result = await parse_stage(collect_result, request.url)
         
         # 3. 清洗数据
-        clean_result = await call_service("cleaner", "/clean", "POST", data=parse_result)
+        clean_result = await clean_stage(parse_result)
         
         # 4. 自动入库（若非重复）
         saved = False
         saved_item = None
         try:
             if clean_result and not clean_result.get("is_duplicate") and clean_result.get("cleaned_item"):
-                # news-service 的创建接口期望字段：title, content, publish_time, author, source, url, category?, tags?
-                cleaned_item = clean_result.get("cleaned_item", {})
-                create_payload = {
-                    "title": cleaned_item.get("title"),
-                    "content": cleaned_item.get("content"),
-                    "publish_time": cleaned_item.get("publish_time"),
-                    "author": cleaned_item.get("author"),
-                    "source": cleaned_item.get("source"),
-                    "url": cleaned_item.get("url"),
-                    # 可选：分类与标签暂不自动推断
-                }
+                create_payload = _create_payload(clean_result.get("cleaned_item", {}))
                 saved_item = await call_service("news", "/news", "POST", data=create_payload)
                 saved = True
+            await commit_collected([collect_result])
         except Exception:
             # 入库失败不影响处理流程结果返回
             saved = False
@@ -134,6 +899,7 @@ async def process_news(request: CollectRequest):
         
         return {
             "success": True,
+            "unchanged": False,
             "data": clean_result,
             "saved": saved,
             "saved_item": saved_item,
@@ -145,117 +911,340 @@ async def process_news(request: CollectRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Processing failed: {str(e)}")
 
-# 新闻服务路由
-@app.api_route("/news/{path:path}", methods=["GET", "POST", "PUT", "DELETE"])
-async def news_proxy(request: Request, path: str):
-    """代理到新闻服务"""
-    method = request.method
-    data = await request.json() if request.method in ["POST", "PUT"] else None
-    params = dict(request.query_params)
-    # GET 列表请求的分页与搜索参数映射：page/limit -> skip/limit，search -> keyword
-    if method == "GET":
-        page = int(params.get("page", "1") or "1")
-        limit = int(params.get("limit", "20") or "20")
-        if page and page > 1:
-            params["skip"] = (page - 1) * limit
-        # 始终传递 limit（即便为默认）保证与前端一致
-        params["limit"] = limit
-        # 重命名搜索参数
-        if "search" in params:
-            params["keyword"] = params.pop("search")
-        # 移除前端分页参数避免后端误识别
-        params.pop("page", None)
-
-    # 特例：news-service 中的非 /news 前缀端点需要直通映射
-    # /news/import/* -> /import/*, /news/top -> /top, /news/rescore -> /rescore, /news/score/{id} -> /score/{id}
-    if path.startswith("import/"):
-        return await call_service("news", f"/{path}", method, data=data, params=params)
-    if path == "top":
-        return await call_service("news", "/top", method, data=data, params=params)
-    if path == "rescore":
-        return await call_service("news", "/rescore", method, data=data, params=params)
-    if path.startswith("score/"):
-        return await call_service("news", f"/{path}", method, data=data, params=params)
-
-    return await call_service("news", f"/news/{path}", method, data=data, params=params)
+def _create_payload(cleaned_item: dict) -> dict:
+    """news-service 的创建接口期望字段：title, content, publish_time, author, source, url, category?, tags?"""
+    return {
+        "title": cleaned_item.get("title"),
+        "content": cleaned_item.get("content"),
+        "publish_time": cleaned_item.get("publish_time"),
+        "author": cleaned_item.get("author"),
+        "source": cleaned_item.get("source"),
+        "url": cleaned_item.get("url"),
+        # 可选：分类与标签暂不自动推断
+    }
 
-# 兼容根路径 /news 的代理（避免重定向问题）
-@app.api_route("/news", methods=["GET", "POST"])
-async def news_root_proxy(request: Request):
-    method = request.method
-    data = await request.json() if request.method == "POST" else None
-    params = dict(request.query_params)
-    if method == "GET":
-        page = int(params.get("page", "1") or "1")
-        limit = int(params.get("limit", "20") or "20")
-        if page and page > 1:
-            params["skip"] = (page - 1) * limit
-        params["limit"] = limit
-        if "search" in params:
-            params["keyword"] = params.pop("search")
-        params.pop("page", None)
-    return await call_service("news", "/news", method, data=data, params=params)
-
-# 兼容新闻服务的导入与评分等非 /news 前缀端点
+# ===== 批量处理 =====
+# 多个 URL 并发流经 收集 -> 解析 -> 清洗，每个阶段单独限流；入库在最后一次性调用 news-service 批量写入。
+BATCH_MAX_URLS = int(os.getenv("GATEWAY_BATCH_MAX_URLS", "100"))
+BATCH_STAGE_CONCURRENCY = {
+    "collect": int(os.getenv("GATEWAY_BATCH_COLLECT_CONCURRENCY", "8")),
+    "parse": int(os.getenv("GATEWAY_BATCH_PARSE_CONCURRENCY", "4")),
+    "clean": int(os.getenv("GATEWAY_BATCH_CLEAN_CONCURRENCY", "8")),
+}
+# 批量请求排队时间长，使用单独的总时限代替 GATEWAY_REQUEST_DEADLINE_SECONDS
+BATCH_DEADLINE_SECONDS = float(os.getenv("GATEWAY_BATCH_DEADLINE_SECONDS", "300"))
+
+async def _run_stage(result: dict, stage: str, semaphore: asyncio.Semaphore, coro_factory):
+    """在阶段信号量内执行一步，并把耗时记入该 URL 的结果"""
+    async with semaphore:
+        started = time.perf_counter()
+        try:
+            return await coro_factory()
+        finally:
+            result["timings"][stage] = round((time.perf_counter() - started) * 1000, 3)
+
+async def _process_one(url: str, semaphores: Dict[str, asyncio.Semaphore], force: bool = False) -> dict:
+    result = {"url": url, "success": False, "unchanged": False, "duplicate": False, "saved": False, "saved_count": 0, "timings": {}}
+    try:
+        collect_result = await _run_stage(result, "collect", semaphores["collect"], lambda: collect_stage(url, force))
+        if not collect_result.get("success"):
+            result.update(stage="collect", error=collect_result.get("error") or "Failed to collect data")
+            return result
+        if collect_result.get("unchanged"):
+            # 页面未变化，后续阶段全部跳过
+            result.update(success=True, unchanged=True)
+            return result
+        result["collected"] = {"url": url, "digest": collect_result.get("digest")}
+
+        if pipeline.is_feed(collect_result.get("body", b"")):
+            entries = await _run_stage(result, "parse", semaphores["parse"], lambda: parse_feed_stage(collect_result, url))
+            clean_results = await _run_stage(result, "clean", semaphores["clean"], lambda: clean_entries_stage(entries))
+            result.update(feed=True, entries=len(entries))
+        else:
+            parse_result = await _run_stage(result, "parse", semaphores["parse"], lambda: parse_stage(collect_result, url))
+            clean_results = [await _run_stage(result, "clean", semaphores["clean"], lambda: clean_stage(parse_result))]
+        duplicate = bool(clean_results) and all(r.get("is_duplicate") for r in clean_results)
+        cleaned_items = [r["cleaned_item"] for r in clean_results if not r.get("is_duplicate") and r.get("cleaned_item")]
+    except HTTPException as e:
+        # 失败发生在最后一个记录了耗时的阶段
+        result.update(stage=list(result["timings"])[-1], error=str(e.detail))
+        return result
+    except Exception as e:
+        # 下游返回了意外的数据（缺字段、非 JSON 等）：同样只记为该 URL 失败，不影响批内其他 URL
+        result.update(stage=list(result["timings"])[-1] if result["timings"] else "collect", error=f"{type(e).__name__}: {e}")
+        return result
+
+    result.update(success=True, duplicate=duplicate, cleaned_items=cleaned_items)
+    return result
+
+@app.post("/process-news/batch")
+async def process_news_batch(request: BatchCollectRequest):
+    """批量新闻处理：多个 URL 并发流水线处理，最后一次性批量入库"""
+    urls = list(dict.fromkeys(u for u in request.urls if u))
+    if not urls:
+        raise HTTPException(status_code=400, detail="No urls provided")
+    if len(urls) > BATCH_MAX_URLS:
+        raise HTTPException(status_code=400, detail=f"Too many urls (max {BATCH_MAX_URLS})")
+
+    started = time.perf_counter()
+    if BATCH_DEADLINE_SECONDS > 0:
+        _request_deadline.set(time.monotonic() + BATCH_DEADLINE_SECONDS)
+    semaphores = {stage: asyncio.Semaphore(limit) for stage, limit in BATCH_STAGE_CONCURRENCY.items()}
+    results = await asyncio.gather(*(_process_one(url, semaphores, request.force) for url in urls))
+
+    # 一次批量写入代替逐条 POST /news
+    to_save = [r for r in results if r.get("cleaned_items")]
+    save_ms = 0.0
+    save_error = None
+    if to_save:
+        save_started = time.perf_counter()
+        try:
+            created = await save_items([item for r in to_save for item in r["cleaned_items"]])
+            saved_urls = {item.get("url") for item in created}
+            for r in to_save:
+                r["saved_count"] = sum(1 for item in r["cleaned_items"] if item.get("url") in saved_urls)
+                r["saved"] = r["saved_count"] > 0
+        except HTTPException as e:
+            save_error = str(e.detail)
+        save_ms = round((time.perf_counter() - save_started) * 1000, 3)
+    # 入库失败时带条目的页面不确认，下次批量采集会重新处理
+    await commit_collected([
+        r["collected"] for r in results
+        if r["success"] and "collected" in r and (save_error is None or not r.get("cleaned_items"))
+    ])
+    for r in results:
+        r.pop("cleaned_items", None)
+        r.pop("collected", None)
+
+    stage_timings = {}
+    for stage in ("collect", "parse", "clean"):
+        values = [r["timings"][stage] for r in results if stage in r["timings"]]
+        stage_timings[stage] = {
+            "count": len(values),
+            "total_ms": round(sum(values), 3),
+            "max_ms": max(values) if values else 0.0,
+        }
+    stage_timings["save"] = {"count": 1 if to_save else 0, "total_ms": save_ms, "max_ms": save_ms}
+
+    return {
+        "success": True,
+        "total": len(results),
+        "succeeded": sum(1 for r in results if r["success"]),
+        "unchanged": sum(1 for r in results if r["unchanged"]),
+        "saved": sum(r["saved_count"] for r in results),
+        "save_error": save_error,
+        "results": results,
+        "stage_timings": stage_timings,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 3),
+    }
+
+# 新闻变更订阅（SSE）直通：逐块转发，不做缓冲；须在 /news/{path} 通配路由之前注册
+@app.get("/news/changes")
+async def news_changes_proxy(request: Request):
+    """代理新闻服务的 SSE 变更流"""
+    headers = {}
+    if request.headers.get("last-event-id"):
+        headers["Last-Event-ID"] = request.headers["last-event-id"]
+    client = _get_client("news")
+    # 长连接：不限制读超时，由新闻服务的心跳维持连接
+    upstream_request = client.build_request(
+        "GET", f"{SERVICE_URLS['news']}/news/changes",
+        params=dict(request.query_params), headers=headers,
+        timeout=httpx.Timeout(30.0, read=None),
+    )
+    try:
+        upstream = await client.send(upstream_request, stream=True)
+    except httpx.RequestError as e:
+        raise HTTPException(status_code=503, detail=f"Service news unavailable: {str(e)}")
+    if upstream.status_code != 200:
+        body = await upstream.aread()
+        await upstream.aclose()
+        raise HTTPException(status_code=upstream.status_code, detail=f"Service news error: {body.decode(errors='replace')}")
+
+    async def relay():
+        try:
+            async for chunk in upstream.aiter_raw():
+                yield chunk
+        finally:
+            await upstream.aclose()
+
+    return StreamingResponse(
+        relay(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+def _rewrite_list_params(params: dict) -> dict:
+    """GET 列表请求的分页与搜索参数映射：page/limit -> skip/limit，search -> keyword"""
+    page = int(params.get("page", "1") or "1")
+    limit = int(params.get("limit", "20") or "20")
+    if page and page > 1:
+        params["skip"] = (page - 1) * limit
+    # 始终传递 limit（即便为默认）保证与前端一致
+    params["limit"] = limit
+    # 重命名搜索参数
+    if "search" in params:
+        params["keyword"] = params.pop("search")
+    # 移除前端分页参数避免后端误识别
+    params.pop("page", None)
+    return params
+
+# 兼容新闻服务的导入与评分等非 /news 前缀端点；须注册在 /news/{path:path} 之前，否则会被通配路由先匹配
 @app.get("/news/import/google_news")
 async def news_import_google_proxy(request: Request):
-    params = dict(request.query_params)
-    return await call_service("news", "/import/google_news", "GET", params=params)
+    return await stream_proxy("news", "/import/google_news", request, params=dict(request.query_params))
 
 @app.get("/news/import/newsminimalist")
 async def news_import_minimalist_proxy(request: Request):
-    params = dict(request.query_params)
-    return await call_service("news", "/import/newsminimalist", "GET", params=params)
+    return await stream_proxy("news", "/import/newsminimalist", request, params=dict(request.query_params))
 
 @app.get("/news/top")
 async def news_top_proxy(request: Request):
     params = dict(request.query_params)
-    return await call_service("news", "/top", "GET", params=params)
+    return await proxy_get("news", "/top", request, params=params)
 
 @app.post("/news/rescore")
 async def news_rescore_proxy(request: Request):
-    params = dict(request.query_params)
-    return await call_service("news", "/rescore", "POST", params=params)
+    return await stream_proxy("news", "/rescore", request, params=dict(request.query_params))
 
 @app.post("/news/score/{news_id}")
-async def news_score_proxy(news_id: str):
-    return await call_service("news", f"/score/{news_id}", "POST")
+async def news_score_proxy(request: Request, news_id: str):
+    return await stream_proxy("news", f"/score/{news_id}", request)
+
+# 新闻服务路由
+@app.api_route("/news/{path:path}", methods=["GET", "POST", "PUT", "DELETE"])
+async def news_proxy(request: Request, path: str):
+    """代理到新闻服务（请求体与响应体不做 JSON 解析，直接流式转发）"""
+    params = dict(request.query_params)
+    if request.method == "GET":
+        params = _rewrite_list_params(params)
+
+    # 特例：news-service 中的非 /news 前缀端点需要直通映射（导入、评分与 /top 已有上面的专用路由，这里兜底其他方法与 /stats）
+    # /news/import/* -> /import/*, /news/top -> /top, /news/stats -> /stats, /news/rescore -> /rescore, /news/score/{id} -> /score/{id}
+    if path.startswith(("import/", "score/")) or path in ("top", "stats", "rescore"):
+        endpoint = f"/{path}"
+    else:
+        endpoint = f"/news/{path}"
+
+    if request.method == "GET":
+        return await proxy_get("news", endpoint, request, params=params)
+    return await stream_proxy("news", endpoint, request, params=params)
+
+# 兼容根路径 /news 的代理（避免重定向问题）
+@app.api_route("/news", methods=["GET", "POST"])
+async def news_root_proxy(request: Request):
+    params = dict(request.query_params)
+    if request.method == "GET":
+        return await proxy_get("news", "/news", request, params=_rewrite_list_params(params))
+    return await stream_proxy("news", "/news", request, params=params)
 
 # 分类服务路由
 @app.api_route("/categories/{path:path}", methods=["GET", "POST", "PUT", "DELETE"])
 async def category_proxy(request: Request, path: str):
-    """代理到分类服务"""
-    method = request.method
-    data = await request.json() if request.method in ["POST", "PUT"] else None
+    """代理到分类服务（请求体与响应体直接流式转发）"""
     params = dict(request.query_params)
-    
-    return await call_service("category", f"/categories/{path}", method, data=data, params=params)
+    if request.method == "GET":
+        return await proxy_get("category", f"/categories/{path}", request, params=params)
+    return await stream_proxy("category", f"/categories/{path}", request, params=params)
 
 # 兼容根路径 /categories 的代理
 @app.api_route("/categories", methods=["GET", "POST"])
 async def categories_root_proxy(request: Request):
-    method = request.method
-    data = await request.json() if request.method == "POST" else None
     params = dict(request.query_params)
-    return await call_service("category", "/categories", method, data=data, params=params)
+    if request.method == "GET":
+        return await proxy_get("category", "/categories", request, params=params)
+    return await stream_proxy("category", "/categories", request, params=params)
+
+# ===== 健康检查 =====
+# 后台任务每 GATEWAY_HEALTH_INTERVAL_SECONDS 秒并发探测各服务的 /health，/health 直接返回最近一次快照。
+HEALTH_INTERVAL_SECONDS = float(os.getenv("GATEWAY_HEALTH_INTERVAL_SECONDS", "15"))
+HEALTH_TIMEOUT_SECONDS = float(os.getenv("GATEWAY_HEALTH_TIMEOUT_SECONDS", "3"))
+health_snapshot: Dict[str, dict] = {
+    name: {"status": "unknown", "latency_ms": None, "last_checked": None, "last_success": None, "error": None}
+    for name in SERVICE_URLS
+}
+_health_refreshed_at: Optional[str] = None
+
+async def _probe_service(service_name: str) -> None:
+    entry = health_snapshot[service_name]
+    started = time.perf_counter()
+    try:
+        # 探测不经过熔断与重试，才能如实反映服务当前状态
+        response = await _get_client(service_name).get(f"{SERVICE_URLS[service_name]}/health", timeout=HEALTH_TIMEOUT_SECONDS)
+        entry["status"] = "healthy" if response.status_code == 200 else "unhealthy"
+        entry["error"] = None if response.status_code == 200 else f"HTTP {response.status_code}"
+    except Exception as e:
+        entry["status"] = "unavailable"
+        entry["error"] = str(e) or type(e).__name__
+    entry["latency_ms"] = round((time.perf_counter() - started) * 1000, 3)
+    entry["last_checked"] = datetime.now().isoformat()
+    if entry["status"] == "healthy":
+        entry["last_success"] = entry["last_checked"]
+
+async def refresh_health() -> None:
+    global _health_refreshed_at
+    await asyncio.gather(*(_probe_service(name) for name in SERVICE_URLS))
+    _health_refreshed_at = datetime.now().isoformat()
+
+async def _health_loop():
+    while True:
+        await refresh_health()
+        await asyncio.sleep(HEALTH_INTERVAL_SECONDS)
 
 @app.get("/health")
 async def health_check():
-    """健康检查，验证所有服务状态"""
-    services_status = {}
-    
-    for service_name, service_url in SERVICE_URLS.items():
-        try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(f"{service_url}/docs", timeout=5.0)
-                services_status[service_name] = "healthy" if response.status_code == 200 else "unhealthy"
-        except:
-            services_status[service_name] = "unavailable"
-    
-    overall_status = "healthy" if all(status == "healthy" for status in services_status.values()) else "degraded"
+    """健康检查：返回后台探测的各服务状态快照"""
+    if _health_refreshed_at is None:
+        # 启动后首次探测尚未完成（或未经 lifespan 启动后台任务）时同步探测一次
+        await refresh_health()
+    overall_status = "healthy" if all(entry["status"] == "healthy" for entry in health_snapshot.values()) else "degraded"
     
     return {
         "status": overall_status,
-        "services": services_status,
-        "timestamp": "2024-01-15T14:30:00Z"
-    }
\ No newline at end of file
+        "services": health_snapshot,
+        "breakers": {name: {**_breaker(name).snapshot(), **resilience_stats[name]} for name in SERVICE_URLS},
+        "checked_at": _health_refreshed_at,
+        "timestamp": datetime.now().isoformat()
+    }
+
+@app.get("/debug/cache")
+async def debug_cache():
+    """查看网关响应缓存的配置与命中统计"""
+    return {
+        "ttls": CACHE_TTLS,
+        "stale_seconds": CACHE_STALE_SECONDS,
+        "max_bytes": CACHE_MAX_BYTES,
+        "bytes": response_cache.bytes,
+        "entries": len(response_cache.entries),
+        **response_cache.stats,
+    }
+
+@app.get("/debug/singleflight")
+async def debug_singleflight():
+    """查看请求合并统计：coalesced 即节省的下游请求数"""
+    total = singleflight_stats["upstream"] + singleflight_stats["coalesced"]
+    return {
+        **singleflight_stats,
+        "in_flight": len(_inflight),
+        "saved_ratio": round(singleflight_stats["coalesced"] / total, 4) if total else 0.0,
+    }
+
+@app.get("/debug/pools")
+async def debug_pools():
+    """查看各下游服务连接池的配置、连接状态与调用统计"""
+    pools = {}
+    for service_name in SERVICE_URLS:
+        client = _get_client(service_name)
+        stats = pool_stats[service_name]
+        completed = stats["requests"] - stats["in_flight"]
+        pools[service_name] = {
+            "base_url": SERVICE_URLS[service_name],
+            "http2": HTTP2_AVAILABLE,
+            "config": _pool_config(service_name),
+            "connections": _pool_connections(client),
+            "requests": stats["requests"],
+            "errors": stats["errors"],
+            "in_flight": stats["in_flight"],
+            "avg_latency_ms": round(stats["total_ms"] / completed, 3) if completed else None,
+        }
+    return {"http2_available": HTTP2_AVAILABLE, "pools": pools}
@@ -0,0 +1,60 @@
+"""进程内流水线：把采集、解析、清洗服务的 main.py 当作库加载，直接调用其处理函数。
+
+省去 网关 -> 采集 -> 网关 -> 解析 -> 网关 -> 清洗 三次网络往返和大段 HTML 的 JSON 编解码。
+解析在进程池中执行（需可 pickle 的模块级函数，故单独成模块）；清洗依赖进程内的去重表，只在网关主进程中执行。
+"""
+import importlib.util
+import os
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def _load(service_dir: str):
+    """按路径加载 backend/<service_dir>/main.py；同一进程内只加载一次"""
+    module_name = f"_pipeline_{service_dir.replace('-', '_')}"
+    module = sys.modules.get(module_name)
+    if module is None:
+        path = os.path.join(BACKEND_DIR, service_dir, "main.py")
+        spec = importlib.util.spec_from_file_location(module_name, path)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[module_name] = module
+        spec.loader.exec_module(module)
+    return module
+
+# RSS/Atom 的根元素；正文开头出现任一标记且不是 HTML 页面时按订阅源解析
+FEED_MARKERS = (b"<rss", b"<feed", b"<rdf:rdf")
+
+def is_feed(body: bytes) -> bool:
+    head = body[:2048].lower()
+    return b"<html" not in head and any(marker in head for marker in FEED_MARKERS)
+
+def init_worker():
+    """工作进程初始化：预先加载解析服务，避免首个任务承担导入开销"""
+    _load("parser-service")
+
+async def collect(url: str, force: bool = False) -> dict:
+    """采集（异步 I/O，直接在网关事件循环中执行）；校验信息待入库成功后经 commit 确认"""
+    return await _load("collector-service").fetch(url, force=force, decode=False, commit=False)
+
+def commit(items: list) -> int:
+    """确认已入库页面的校验信息（须在网关主进程调用）"""
+    collector = _load("collector-service")
+    return sum(1 for item in items if collector.commit_validator(item["url"], item["digest"]))
+
+def parse(body: bytes, encoding: str, source_url: str, content_type: str = "html") -> dict:
+    """解码并解析（CPU 密集，在工作进程中执行）"""
+    return _load("parser-service").parse_bytes(body, content_type, source_url, encoding).dict()
+
+def parse_feed(body: bytes, encoding: str, source_url: str) -> list:
+    """解析订阅源的全部条目（在工作进程中执行）"""
+    return _load("parser-service").parse_feed_bytes(body, source_url, encoding)
+
+def clean(parse_result: dict) -> dict:
+    """清洗并去重（去重表在本进程内，须在网关主进程调用）"""
+    cleaner = _load("cleaner-service")
+    return cleaner.clean_data(cleaner.NewsItem(**parse_result))
+
+def clean_batch(parse_results: list) -> list:
+    """批量清洗订阅源条目（同样须在网关主进程调用）"""
+    cleaner = _load("cleaner-service")
+    return cleaner.clean_items([cleaner.NewsItem(**result) for result in parse_results])
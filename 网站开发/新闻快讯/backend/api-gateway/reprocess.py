@@ -0,0 +1,92 @@
+"""离线重放：把采集服务归档的原始页面重新经过解析、清洗，不发起任何网络请求。
+
+修改 parse_html 的选择器或 clean_text 的规则后，用它检查新规则在历史页面上的效果。
+解析在进程池中并行执行（与网关进程内流水线共用 pipeline.py），RSS/Atom 按订阅源解析出全部条目；
+清洗在主进程中按归档顺序执行。结果以 NDJSON 逐行输出（每个条目一行，含 url、fetched_at、hash、duplicate、item，
+订阅源条目另带 feed 与 entry），汇总打印到 stderr。单个页面读取、解析或清洗出错只记入该行的 error，不中断重放。
+
+用法：python reprocess.py [--url URL] [--since 2026-10-01T00:00:00] [--all] [--workers N] [--output 文件]
+归档目录与采集服务相同（COLLECTOR_ARCHIVE_DIR）。
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pipeline
+
+sys.path.insert(0, os.path.join(pipeline.BACKEND_DIR, "collector-service"))
+import archive  # noqa: E402
+
+def _parse_entry(entry: dict) -> dict:
+    """在工作进程中读取、解压并解析一个归档页面；返回 {"feed", "items"} 或 {"error"}，不抛异常"""
+    try:
+        body = archive.read(entry["hash"])
+    except OSError as e:
+        return {"error": f"archive read failed: {e}"}
+    try:
+        if pipeline.is_feed(body):
+            return {"feed": True, "items": pipeline.parse_feed(body, entry.get("encoding"), entry["url"])}
+        return {"feed": False, "items": [pipeline.parse(body, entry.get("encoding"), entry["url"])]}
+    except Exception as e:
+        return {"error": f"parse failed: {type(e).__name__}: {e}"}
+
+def _clean(parsed: dict) -> list:
+    """在主进程中清洗一个页面解析出的全部条目"""
+    if parsed["feed"]:
+        return pipeline.clean_batch(parsed["items"])
+    return [pipeline.clean(item) for item in parsed["items"]]
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Replay archived pages through parser and cleaner")
+    parser.add_argument("--url", help="only this URL")
+    parser.add_argument("--since", help="only pages fetched at or after this ISO time")
+    parser.add_argument("--all", action="store_true", help="every archived fetch instead of the latest per URL")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--output", help="NDJSON output file (default stdout)")
+    args = parser.parse_args(argv)
+
+    if not archive.ENABLED:
+        print("archive disabled: set COLLECTOR_ARCHIVE_DIR and install zstandard", file=sys.stderr)
+        return 1
+    selected = list(archive.entries(url=args.url, since=args.since, latest_only=not args.all))
+    out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    summary = {"pages": len(selected), "feeds": 0, "items": 0, "titled": 0, "with_content": 0, "duplicates": 0, "errors": 0}
+    started = time.perf_counter()
+    try:
+        with ProcessPoolExecutor(max_workers=args.workers, initializer=pipeline.init_worker) as executor:
+            for entry, parsed in zip(selected, executor.map(_parse_entry, selected, chunksize=8)):
+                line = {"url": entry["url"], "fetched_at": entry["fetched_at"], "hash": entry["hash"]}
+                if "error" not in parsed:
+                    try:
+                        clean_results = _clean(parsed)
+                    except Exception as e:
+                        parsed = {"error": f"clean failed: {type(e).__name__}: {e}"}
+                if "error" in parsed:
+                    summary["errors"] += 1
+                    out.write(json.dumps({**line, "error": parsed["error"]}, ensure_ascii=False) + "\n")
+                    continue
+                summary["feeds"] += parsed["feed"]
+                for index, clean_result in enumerate(clean_results):
+                    item = clean_result.get("cleaned_item") or {}
+                    item_line = {**line, "duplicate": bool(clean_result.get("is_duplicate")), "item": item}
+                    if parsed["feed"]:
+                        item_line.update(feed=True, entry=index)
+                    summary["items"] += 1
+                    summary["duplicates"] += item_line["duplicate"]
+                    summary["titled"] += bool(item.get("title"))
+                    summary["with_content"] += bool(item.get("content"))
+                    out.write(json.dumps(item_line, ensure_ascii=False) + "\n")
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    elapsed = time.perf_counter() - started
+    summary["seconds"] = round(elapsed, 3)
+    summary["pages_per_second"] = round(len(selected) / elapsed, 1) if elapsed else 0.0
+    print(json.dumps(summary, ensure_ascii=False), file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
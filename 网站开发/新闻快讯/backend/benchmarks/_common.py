@@ -0,0 +1,86 @@
+"""基准脚本公用工具：按路径加载各服务的 main.py（服务目录名含连字符，无法直接 import）、生成测试页面、启动服务进程"""
+import importlib.util
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def load_service(service_dir: str, module_name: str = None):
+    """加载 backend/<service_dir>/main.py 并返回模块对象"""
+    path = os.path.join(BACKEND_DIR, service_dir, "main.py")
+    # 与 uvicorn 在服务目录下启动时一致：服务目录内的同级模块可直接 import
+    if os.path.dirname(path) not in sys.path:
+        sys.path.insert(0, os.path.dirname(path))
+    module_name = module_name or service_dir.replace("-", "_")
+    spec = importlib.util.spec_from_file_location(module_name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    spec.loader.exec_module(module)
+    return module
+
+SENTENCES = [
+    "记者从有关部门获悉，今年以来各地持续推进重点项目建设，投资规模稳步扩大。",
+    "数据显示，前三季度社会消费品零售总额同比增长{n}%，服务消费增势较好。",
+    "专家表示，新型储能与算力基础设施将成为下一阶段的投资热点。",
+    "该市第{n}批保障性住房项目已全部开工，预计明年年底前交付使用。",
+    "气象台预计，未来{n}天北方地区将出现大范围降温，局地伴有大风。",
+    "The central bank said on Monday it would keep monetary policy stable while supporting growth.",
+    "Officials reported {n} new projects approved in the third quarter, up from a year earlier.",
+    "Analysts expect the technology sector to lead gains as chip demand recovers.",
+    "Rescue teams reached the remote village after {n} hours, local media reported.",
+    "The agreement covers trade, energy and climate cooperation over the next five years.",
+]
+
+def make_article_html(i: int = 0, paragraphs: int = 60) -> str:
+    """生成一篇带导航、脚本、样式与评论区的新闻页面，正文位于 <article> 内；段落由随机句子拼成，压缩率接近真实页面"""
+    rng = random.Random(i)
+    def paragraph() -> str:
+        return "".join(rng.choice(SENTENCES).format(n=rng.randint(2, 999)) for _ in range(rng.randint(2, 5)))
+    nav = "".join(f'<li><a href="/channel/{rng.getrandbits(32):x}">频道 {n}</a></li>' for n in range(80))
+    body = "".join(f"<p>{paragraph()}</p>" for _ in range(paragraphs))
+    comments = "".join(
+        f'<div class="comment" data-id="{rng.getrandbits(40):x}"><span class="user">网友{rng.randint(1000, 99999)}</span>'
+        f"<p>{rng.choice(SENTENCES).format(n=rng.randint(2, 999))}</p></div>" for _ in range(100))
+    return (
+        "<!DOCTYPE html><html><head><meta charset=\"utf-8\">"
+        f"<title>示例新闻标题 {i} - Example News</title>"
+        "<style>" + "".join(f".c{n}{{margin:{n % 7}px;color:#{rng.getrandbits(24):06x}}}" for n in range(150)) + "</style>"
+        "<script>" + "".join(f"window.cfg{n}={rng.getrandbits(32)};" for n in range(150)) + "</script>"
+        "</head><body>"
+        f'<ul class="nav">{nav}</ul>'
+        f'<div class="main"><article><h1>示例新闻标题 {i}</h1>'
+        f'<time datetime="2026-10-19T08:00:00">2026-10-19 08:00:00</time>{body}</article></div>'
+        f'<div class="comments">{comments}</div>'
+        "<footer>版权所有 Example News</footer></body></html>"
+    )
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def start_process(args, cwd: str, port: int, env: dict = None) -> subprocess.Popen:
+    """启动子进程并等待其端口可连接"""
+    proc = subprocess.Popen(args, cwd=cwd, env={**os.environ, **(env or {})},
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 20
+    while time.time() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return proc
+        except OSError:
+            time.sleep(0.1)
+    proc.kill()
+    raise RuntimeError(f"process {args} did not start on port {port}")
+
+def start_service(service_dir: str, env: dict = None):
+    """以 uvicorn 子进程启动 backend/<service_dir> 服务，返回 (进程, 基础 URL)"""
+    port = free_port()
+    proc = start_process([sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1",
+                          "--port", str(port), "--log-level", "warning"],
+                         os.path.join(BACKEND_DIR, service_dir), port, env)
+    return proc, f"http://127.0.0.1:{port}"
@@ -0,0 +1,85 @@
+"""文本清洗基准：比较 clean_text 原实现（函数内 import re、先合并空白再逐字符 re.sub）、单次正则扫描同时合并空白与过滤字符的实现
+与当前实现在长篇中文、英文正文及短标题上的单次耗时，并核对三者输出一致；另比较逐条 clean_data 与 clean_items 批量清洗一批新闻的耗时。
+
+用法：python bench_clean_text.py [每组重复次数，默认 200]
+"""
+import random
+import re
+import sys
+import time
+
+from _common import SENTENCES, load_service
+
+def clean_text_original(text: str) -> str:
+    """改动前的实现，作为对照"""
+    if not text:
+        return ""
+    text = ' '.join(text.split())
+    import re
+    text = re.sub(r'[^一-龥a-zA-Z0-9\s.,!?;:"()\-]', '', text)
+    return text.strip()
+
+# 单次扫描：空白段替换为一个空格、不允许的字符段删除，一个预编译正则完成合并与过滤
+_SINGLE_PASS = re.compile(r'(\s+)|[^一-龥a-zA-Z0-9\s.,!?;:"()\-]+')
+
+def clean_text_single_pass(text: str) -> str:
+    if not text:
+        return ""
+    return _SINGLE_PASS.sub(lambda m: ' ' if m.group(1) else '', text).strip()
+
+def make_body(rng: random.Random, sentences, paragraphs: int = 40) -> str:
+    """按段落拼出正文；段落间为换行与全角缩进，与解析出的网页正文相近"""
+    def paragraph() -> str:
+        return " ".join(rng.choice(sentences).format(n=rng.randint(2, 999)) for _ in range(rng.randint(3, 6)))
+    return "\n　　".join(paragraph() for _ in range(paragraphs))
+
+def timed(func, texts, repeat: int) -> float:
+    """每段文本的平均耗时（微秒）"""
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for text in texts:
+            func(text)
+    return (time.perf_counter() - started) / (repeat * len(texts)) * 1e6
+
+def main(repeat: int):
+    cleaner = load_service("cleaner-service")
+    rng = random.Random(0)
+    chinese = [s for s in SENTENCES if not s.isascii()]
+    english = [s for s in SENTENCES if s.isascii()]
+    # 英文新闻常带弯引号、破折号等非 ASCII 标点，走正则路径
+    typographic = [s.replace("said", "said “yes” —") for s in english]
+    cases = {
+        "zh article": [make_body(rng, chinese) for _ in range(10)],
+        "en article": [make_body(rng, english) for _ in range(10)],
+        "en typographic": [make_body(rng, typographic) for _ in range(10)],
+        "short title": [rng.choice(SENTENCES).format(n=i)[:30] + " - 新闻网 | News" for i in range(200)],
+    }
+    print(f"{'case':<15} {'chars':>7} {'original us':>12} {'single-pass us':>15} {'current us':>11} {'speedup':>8}")
+    for name, texts in cases.items():
+        for func in (clean_text_single_pass, cleaner.clean_text):
+            mismatched = sum(clean_text_original(t) != func(t) for t in texts)
+            if mismatched:
+                print(f"warning: {name} {func.__name__} output differs on {mismatched}/{len(texts)} texts")
+        count = max(1, repeat * 10 // len(texts)) if name == "short title" else repeat
+        original = timed(clean_text_original, texts, count)
+        single_pass = timed(clean_text_single_pass, texts, count)
+        current = timed(cleaner.clean_text, texts, count)
+        chars = sum(map(len, texts)) // len(texts)
+        print(f"{name:<15} {chars:>7} {original:>12.1f} {single_pass:>15.1f} {current:>11.1f} {original / current:>7.2f}x")
+
+    # 一次订阅源抓取的 200 条：逐条 clean_data 与一次 clean_items
+    items = [cleaner.NewsItem(title=cases["short title"][i], content=cases["zh article"][i % 10][:2000] + str(i),
+                              author="记者 张三", source="bench", url=f"https://example.com/{i}") for i in range(200)]
+    cleaner.deduplication_store.clear()
+    started = time.perf_counter()
+    for item in items:
+        cleaner.clean_data(item)
+    single = time.perf_counter() - started
+    cleaner.deduplication_store.clear()
+    started = time.perf_counter()
+    cleaner.clean_items(items)
+    batch = time.perf_counter() - started
+    print(f"200 items: clean_data loop {single * 1000:.1f} ms, clean_items {batch * 1000:.1f} ms")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
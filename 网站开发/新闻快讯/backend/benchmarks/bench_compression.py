@@ -0,0 +1,62 @@
+"""压缩基准：对典型载荷比较各编码的传输字节数与压缩/解压 CPU 耗时（使用 backend/common/compression.py 的默认级别）。
+
+载荷：采集到的新闻页面 HTML、网关发给解析服务的 /parse 请求体、/news 列表响应（20 条）。
+用法：python bench_compression.py [每项重复次数，默认 200]
+"""
+import json
+import os
+import random
+import sys
+import time
+
+from _common import BACKEND_DIR, SENTENCES, make_article_html
+
+sys.path.insert(0, os.path.join(BACKEND_DIR, "common"))
+import compression  # noqa: E402
+
+def news_list(count: int = 20) -> bytes:
+    rng = random.Random(0)
+    items = [{
+        "id": f"{i:08x}-0000-4000-8000-000000000000",
+        "title": f"示例新闻标题 {i}：" + rng.choice(SENTENCES).format(n=rng.randint(2, 999))[:24],
+        "content": "".join(rng.choice(SENTENCES).format(n=rng.randint(2, 999)) for _ in range(8)),
+        "publish_time": "2026-10-19 08:00:00",
+        "author": None,
+        "source": "news.google.com",
+        "url": f"https://example.com/news/{i}",
+        "category": "国内",
+        "tags": ["经济", "政策"],
+        "language": "zh",
+        "significance_score": 6.5,
+        "created_at": "2026-10-19 08:01:00",
+        "updated_at": "2026-10-19 08:01:00",
+    } for i in range(count)]
+    return json.dumps(items, ensure_ascii=False).encode()
+
+def timed(func, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - started) / repeat * 1000
+
+def main(repeat: int):
+    html = make_article_html(1).encode()
+    payloads = {
+        "article html": html,
+        "/parse body": json.dumps({"content": html.decode(), "content_type": "html", "source_url": "https://example.com/a"},
+                                  ensure_ascii=False).encode(),
+        "/news list": news_list(),
+    }
+    print(f"encodings={compression.AVAILABLE_ENCODINGS} min_size={compression.MIN_SIZE} repeat={repeat}")
+    print(f"{'payload':<14} {'encoding':<9} {'bytes':>8} {'ratio':>6} {'compress ms':>12} {'decompress ms':>14}")
+    for name, data in payloads.items():
+        print(f"{name:<14} {'identity':<9} {len(data):>8} {1.0:>6.2f} {0.0:>12.3f} {0.0:>14.3f}")
+        for encoding in compression.AVAILABLE_ENCODINGS:
+            compressed = compression.compress(data, encoding)
+            compress_ms = timed(lambda: compression.compress(data, encoding), repeat)
+            decompress_ms = timed(lambda: compression.decompress(compressed, encoding), repeat)
+            print(f"{name:<14} {encoding:<9} {len(compressed):>8} {len(data) / len(compressed):>6.2f} "
+                  f"{compress_ms:>12.3f} {decompress_ms:>14.3f}")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
@@ -0,0 +1,70 @@
+"""新闻存储内存基准：比较 dict 存储与 NewsRecord 紧凑记录在 N 条新闻时的每条字节数。
+
+用法：python bench_news_memory.py [条数，默认 100000]
+"""
+import gc
+import json
+import random
+import sys
+import tracemalloc
+
+from _common import load_service
+
+SOURCES = ["news.google.com", "newsminimalist.com", "www.people.com.cn", "www.xinhuanet.com", "www.163.com"]
+CATEGORIES = ["world", "politics", "technology", "business", "finance", "综合", "国内", "国际"]
+LANGUAGES = ["en", "zh", "fr", "de", "es", "it", "ru", "uk", "sv", "el", "ar", "hi"]
+TAGS = ["AI", "经济", "政策", "科技", "突破", "市场", "国际", "选举"]
+
+def make_payload(i: int, rng: random.Random) -> str:
+    """模拟一次写入请求的 JSON 体：每条记录的字符串都是新解码出来的独立对象"""
+    ts = f"2026-10-{rng.randint(1, 28):02d} {rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}:00"
+    item = {
+        "id": f"{i:08x}-0000-4000-8000-{rng.getrandbits(48):012x}",
+        "title": f"新闻标题 {i} " + "示例" * rng.randint(4, 12),
+        "content": None,
+        "publish_time": ts,
+        "author": None,
+        "source": rng.choice(SOURCES),
+        "url": f"https://example.com/news/{i}",
+        "category": rng.choice(CATEGORIES),
+        "tags": rng.sample(TAGS, rng.randint(0, 3)),
+        "language": rng.choice(LANGUAGES),
+        "significance_score": None,
+        "significance_factors": None,
+        "created_at": ts,
+        "updated_at": ts,
+    }
+    if i % 2 == 0:
+        factors = {k: round(rng.uniform(0, 10), 3) for k in ("scale", "impact", "novelty", "potential", "legacy", "positivity", "credibility")}
+        item["significance_factors"] = factors
+        item["significance_score"] = round(sum(factors.values()) / 7, 3)
+    return json.dumps(item, ensure_ascii=False)
+
+def measure(payloads, convert) -> int:
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    store = {}
+    for payload in payloads:
+        data = json.loads(payload)
+        store[data["id"]] = convert(data)
+    gc.collect()
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del store
+    return used
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    news = load_service("news-service")
+    rng = random.Random(42)
+    payloads = [make_payload(i, rng) for i in range(count)]
+    baseline = measure(payloads, lambda d: d)
+    compact = measure(payloads, news.NewsRecord)
+    print(f"条数: {count}")
+    print(f"dict 存储:       {baseline / count:8.1f} 字节/条  共 {baseline / 1e6:.1f} MB")
+    print(f"NewsRecord 存储: {compact / count:8.1f} 字节/条  共 {compact / 1e6:.1f} MB")
+    print(f"节省: {(1 - compact / baseline) * 100:.1f}%")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""解析后端基准：在同一批测试页面上比较 parse_html 各后端（含 PARSER_SELECTIVE 选择性解析）的吞吐与单页耗时、内存峰值，并核对提取结果一致。
+
+内存为在全新子进程中解析一个约 440KB 的大页面前后的峰值 RSS 之差（常规测试页面太小，增量被进程已有的空闲内存吸收），
+包含 lxml/libxml2 在 C 层分配的内存。峰值读取 /proc/self/status 的 VmHWM（ru_maxrss 会跨 exec 继承父进程的峰值）。
+用法：python bench_parser.py [页面数，默认 200]
+"""
+import multiprocessing
+import resource
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from _common import load_service, make_article_html
+
+def backends(parser) -> dict:
+    result = {
+        "bs4": lambda doc, url: parser.parse_html_bs4(doc, url, selective=False),
+        "bs4-sel": lambda doc, url: parser.parse_html_bs4(doc, url, selective=True),
+    }
+    if parser.etree is not None:
+        result["lxml"] = parser.parse_html_lxml
+        result["lxml-sel"] = parser.parse_html_selective
+    return result
+
+def run_backend(parse, docs) -> float:
+    parse(docs[0], "https://example.com/0")  # 预热
+    started = time.perf_counter()
+    for i, doc in enumerate(docs):
+        parse(doc, f"https://example.com/{i}")
+    return time.perf_counter() - started
+
+def _peak_rss_kb() -> int:
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+def peak_kb(name: str) -> int:
+    """在子进程中执行：解析大页面带来的峰值 RSS 增量（KB）"""
+    parse = backends(load_service("parser-service"))[name]
+    doc = make_article_html(0, paragraphs=2000)
+    parse("<html><title>t</title><article><time>t</time></article></html>", "warmup")
+    before = _peak_rss_kb()
+    parse(doc, "https://example.com/0")
+    return _peak_rss_kb() - before
+
+def main(count: int):
+    parser = load_service("parser-service")
+    docs = [make_article_html(i) for i in range(count)]
+    candidates = backends(parser)
+
+    reference = [candidates["bs4"](doc, "u") for doc in docs[:20]]
+    for name, parse in candidates.items():
+        mismatched = sum(parse(doc, "u") != expected for doc, expected in zip(docs, reference))
+        if mismatched:
+            print(f"warning: {name} differs from bs4 on {mismatched}/{len(reference)} pages")
+
+    page_kb = sum(len(doc.encode()) for doc in docs) / len(docs) / 1024
+    print(f"docs={count} page={page_kb:.0f}KB")
+    print(f"{'backend':<9} {'seconds':>8} {'docs/s':>8} {'ms/doc':>8} {'peak KB (440KB page)':>21}")
+    context = multiprocessing.get_context("spawn")
+    for name, parse in candidates.items():
+        elapsed = run_backend(parse, docs)
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+            memory = executor.submit(peak_kb, name).result()
+        print(f"{name:<9} {elapsed:>8.2f} {count / elapsed:>8.1f} {elapsed / count * 1000:>8.2f} {memory:>21}")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
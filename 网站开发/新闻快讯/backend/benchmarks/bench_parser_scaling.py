@@ -0,0 +1,54 @@
+"""解析服务并发扩展基准：以线程池模式与不同工作进程数的进程池模式启动 parser-service，并发提交 POST /parse/raw，比较吞吐随核数的变化。
+
+每种配置保持 2 × 工作进程数的并发请求，PARSER_MAX_PENDING 放宽到不触发 503。解析后端沿用 PARSER_BACKEND（默认 lxml）。
+用法：python bench_parser_scaling.py [请求数，默认 400]
+"""
+import asyncio
+import os
+import sys
+import time
+
+import httpx
+
+from _common import make_article_html, start_service
+
+PAGES = 50
+
+async def run(base_url: str, docs, count: int, concurrency: int) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=120) as client:
+        async def one(i: int):
+            async with semaphore:
+                response = await client.post("/parse/raw", params={"source_url": f"https://example.com/{i}"}, content=docs[i % len(docs)])
+                response.raise_for_status()
+        await asyncio.gather(*(one(i) for i in range(concurrency)))  # 预热
+        started = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(count)))
+        return time.perf_counter() - started
+
+def worker_counts():
+    cores = os.cpu_count() or 1
+    counts, n = [], 1
+    while n < cores:
+        counts.append(n)
+        n *= 2
+    return counts + [cores]
+
+async def main(count: int):
+    docs = [make_article_html(i).encode() for i in range(PAGES)]
+    configs = [("thread", {"PARSER_EXECUTION": "thread"}, 4)]
+    for workers in worker_counts():
+        configs.append((f"process x{workers}", {"PARSER_EXECUTION": "process", "PARSER_WORKERS": str(workers),
+                                                "PARSER_MAX_PENDING": str(count)}, workers * 2))
+    print(f"requests={count} cores={os.cpu_count()} backend={os.getenv('PARSER_BACKEND', 'lxml')}")
+    print(f"{'mode':<12} {'concurrency':>11} {'seconds':>8} {'docs/s':>8}")
+    for name, env, concurrency in configs:
+        proc, base_url = start_service("parser-service", env)
+        try:
+            elapsed = await run(base_url, docs, count, concurrency)
+        finally:
+            proc.terminate()
+        print(f"{name:<12} {concurrency:>11} {elapsed:>8.2f} {count / elapsed:>8.1f}")
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 400))
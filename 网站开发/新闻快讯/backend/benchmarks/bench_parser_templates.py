@@ -0,0 +1,51 @@
+"""站点模板基准：正文、时间位于通用选择器列表靠后位置（.news-content / .pub-time）的站点，
+比较按通用列表解析与按学习到的站点模板解析的单页耗时，并核对两者提取结果一致。
+
+用法：python bench_parser_templates.py [页面数，默认 200]
+"""
+import sys
+import time
+
+from _common import load_service, make_article_html
+
+def make_site_page(i: int) -> str:
+    """把测试页面改成正文在 <div class="news-content">、时间在 <span class="pub-time"> 的站点结构"""
+    page = make_article_html(i)
+    page = page.replace("<article>", '<div class="news-content">').replace("</article>", "</div>")
+    page = page.replace('<time datetime="2026-10-19T08:00:00">', '<span class="pub-time">').replace("</time>", "</span>")
+    return page
+
+def run(parse, docs, template) -> float:
+    started = time.perf_counter()
+    for i, doc in enumerate(docs):
+        parse(doc, f"https://site.example.com/{i}", template)
+    return time.perf_counter() - started
+
+def main(count: int):
+    parser = load_service("parser-service")
+    docs = [make_site_page(i) for i in range(count)]
+    backends = {
+        "bs4": lambda doc, url, template: parser.parse_html_bs4(doc, url, selective=False, template=template),
+        "bs4-sel": lambda doc, url, template: parser.parse_html_bs4(doc, url, selective=True, template=template),
+    }
+    if parser.etree is not None:
+        backends["lxml"] = lambda doc, url, template: parser.parse_html_lxml(doc, url, template)
+        backends["lxml-sel"] = lambda doc, url, template: parser.parse_html_selective(doc, url, template)
+
+    # 先按通用列表解析一页，让模板学到 .news-content / .pub-time
+    parser.parse_html(docs[0], "https://site.example.com/0")
+    template = parser.template_for("https://site.example.com/0")
+    print(f"docs={count} learned content={template['content'][0]} time={template['time'][0]}")
+    print(f"{'backend':<9} {'generic ms':>11} {'template ms':>12} {'speedup':>8}")
+    for name, parse in backends.items():
+        for doc in docs[:20]:
+            if parse(doc, "u", None) != parse(doc, "u", template):
+                print(f"warning: {name} result differs with template")
+                break
+        parse(docs[0], "u", template)  # 预热
+        generic = run(parse, docs, None)
+        templated = run(parse, docs, template)
+        print(f"{name:<9} {generic / count * 1000:>11.2f} {templated / count * 1000:>12.2f} {generic / templated:>7.2f}x")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
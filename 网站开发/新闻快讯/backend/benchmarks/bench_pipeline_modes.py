@@ -0,0 +1,59 @@
+"""流水线模式吞吐基准：比较 HTTP 微服务模式与网关进程内模式处理 N 个 URL（采集 -> 解析 -> 清洗）的吞吐。
+
+采集、解析、清洗服务与静态页面服务器均以子进程启动；两种模式使用同一批页面和相同的阶段并发限制，不含入库。
+用法：python bench_pipeline_modes.py [URL 数，默认 200]
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+from _common import free_port, load_service, make_article_html, start_process, start_service
+
+PAGES = 50
+
+async def run_mode(gateway, mode: str, urls) -> float:
+    gateway.PIPELINE_MODE = mode
+    semaphores = {stage: asyncio.Semaphore(limit) for stage, limit in gateway.BATCH_STAGE_CONCURRENCY.items()}
+    # 预热：建立连接、拉起工作进程；force 使采集服务不因页面未变化而跳过后续阶段
+    await asyncio.gather(*(gateway._process_one(url, semaphores, force=True) for url in urls[:8]))
+    started = time.perf_counter()
+    results = await asyncio.gather(*(gateway._process_one(url, semaphores, force=True) for url in urls))
+    elapsed = time.perf_counter() - started
+    failed = [r for r in results if not r["success"]]
+    if failed:
+        raise RuntimeError(f"{mode}: {len(failed)} failed, e.g. {failed[0]}")
+    return elapsed
+
+async def main(count: int):
+    processes = []
+    try:
+        site = tempfile.mkdtemp(prefix="bench_pages_")
+        for i in range(PAGES):
+            with open(os.path.join(site, f"{i}.html"), "w", encoding="utf-8") as f:
+                f.write(make_article_html(i))
+        port = free_port()
+        processes.append(start_process([sys.executable, "-m", "http.server", str(port), "--bind", "127.0.0.1"], site, port))
+        urls = [f"http://127.0.0.1:{port}/{i % PAGES}.html?n={i}" for i in range(count)]
+
+        for service_dir, env_key in (("collector-service", "COLLECTOR_URL"), ("parser-service", "PARSER_URL"),
+                                     ("cleaner-service", "CLEANER_URL")):
+            proc, base_url = start_service(service_dir)
+            processes.append(proc)
+            os.environ[env_key] = base_url
+        gateway = load_service("api-gateway")
+
+        page_kb = len(make_article_html(0).encode()) / 1024
+        print(f"urls={count} page={page_kb:.0f}KB concurrency={gateway.BATCH_STAGE_CONCURRENCY} workers={gateway.PIPELINE_WORKERS}")
+        for mode in ("http", "inprocess"):
+            elapsed = await run_mode(gateway, mode, urls)
+            print(f"{mode:<10} {elapsed:7.2f}s  {count / elapsed:8.1f} urls/s")
+        await gateway._close_clients()
+        gateway._shutdown_pipeline_executor()
+    finally:
+        for proc in processes:
+            proc.terminate()
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 200))
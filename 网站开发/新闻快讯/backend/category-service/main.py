@@ -1,9 +1,20 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request, Response
 from pydantic import BaseModel
 from typing import List, Optional
 import uuid
+from datetime import datetime
+import os
+import sys
+
+# 共享的指标采集模块位于 backend/common
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "common"))
+from instrumentation import instrument_app
+from compression import CompressionMiddleware
+import etag
 
 app = FastAPI()
+instrument_app(app, "category")
+app.add_middleware(CompressionMiddleware)
 
 # 数据模型
 class Category(BaseModel):
@@ -39,6 +50,17 @@ sample_categories = [
 for category in sample_categories:
     category_storage[category["id"]] = category
 
+# 存储版本号：每次写操作加一，用于生成 ETag
+category_version = 0
+
+def _bump_version():
+    global category_version
+    category_version += 1
+
+def _conditional(request: Request, response: Response) -> Optional[Response]:
+    """设置 ETag；若客户端缓存仍有效则返回 304 响应，否则返回 None"""
+    return etag.conditional(request, response, category_version)
+
 @app.get("/")
 def read_root():
     return {"message": "Category Service API", "version": "1.0.0"}
@@ -54,11 +76,15 @@ def create_category(category: CategoryCreate):
     )
     
     category_storage[category_id] = category_item.dict()
+    _bump_version()
     return category_item
 
 @app.get("/categories/tree")
-def get_category_tree():
+def get_category_tree(request: Request, response: Response):
     """获取分类树"""
+    not_modified = _conditional(request, response)
+    if not_modified:
+        return not_modified
     nodes = {}
     
     # 创建节点
@@ -85,8 +111,11 @@ def get_category(category_id: str):
     return Category(**category_storage[category_id])
 
 @app.get("/categories", response_model=List[Category])
-def list_categories(parent_id: Optional[str] = None):
+def list_categories(request: Request, response: Response, parent_id: Optional[str] = None):
     """获取分类列表，支持按父分类筛选"""
+    not_modified = _conditional(request, response)
+    if not_modified:
+        return not_modified
     category_list = list(category_storage.values())
     
     if parent_id:
@@ -105,6 +134,7 @@ def update_category(category_id: str, category_update: CategoryUpdate):
     
     existing_category.update(update_data)
     category_storage[category_id] = existing_category
+    _bump_version()
     
     return Category(**existing_category)
 
@@ -120,8 +150,14 @@ def delete_category(category_id: str):
             raise HTTPException(status_code=400, detail="Cannot delete category with children")
     
     del category_storage[category_id]
+    _bump_version()
     return {"message": "Category deleted successfully"}
 
+@app.get("/health")
+def health_check():
+    """健康检查"""
+    return {"status": "healthy", "service": "category", "timestamp": datetime.now().isoformat()}
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8005)
\ No newline at end of file
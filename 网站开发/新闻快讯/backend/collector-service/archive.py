@@ -0,0 +1,158 @@
+"""原始页面归档：采集到的正文按内容摘要 zstd 压缩存放，另有按 URL 与抓取时间的索引，供改了解析/清洗规则后离线重放。
+
+默认关闭，设置 COLLECTOR_ARCHIVE_DIR（如 collector-service/data/archive）开启。目录结构：
+- objects/<摘要前两位>/<摘要>.zst：正文对象，相同内容只存一份
+- index.ndjson：每次抓取追加一行 {url, hash, encoding, fetched_at, size, stored}
+
+对象总字节数超过 COLLECTOR_ARCHIVE_MAX_BYTES（默认 1GB）时按抓取时间从旧到新删除索引记录，
+不再被引用的对象随之删除，并重写索引。需要安装 zstandard，未安装时归档关闭。
+"""
+import json
+import os
+import threading
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+ARCHIVE_DIR = os.getenv("COLLECTOR_ARCHIVE_DIR", "")
+ARCHIVE_MAX_BYTES = int(os.getenv("COLLECTOR_ARCHIVE_MAX_BYTES", str(1024 * 1024 * 1024)))
+ARCHIVE_ZSTD_LEVEL = int(os.getenv("COLLECTOR_ARCHIVE_ZSTD_LEVEL", "6"))
+ENABLED = bool(ARCHIVE_DIR) and zstandard is not None
+
+# 索引按抓取时间顺序保存在内存中；_refs 为每个对象被索引引用的次数，_sizes 为对象压缩后字节数
+_index: List[dict] = []
+_refs: Dict[str, int] = {}
+_sizes: Dict[str, int] = {}
+_total_bytes = 0
+_loaded = False
+_evicted = {"entries": 0, "objects": 0, "bytes": 0}
+_lock = threading.Lock()
+
+def _object_path(digest: str) -> str:
+    return os.path.join(ARCHIVE_DIR, "objects", digest[:2], digest + ".zst")
+
+def _index_path() -> str:
+    return os.path.join(ARCHIVE_DIR, "index.ndjson")
+
+def _ensure_loaded() -> None:
+    """首次使用时读取索引并统计对象大小；末行写了一半（进程被杀）时忽略"""
+    global _loaded, _total_bytes
+    if _loaded:
+        return
+    _loaded = True
+    if not os.path.exists(_index_path()):
+        return
+    with open(_index_path(), "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            digest = entry["hash"]
+            if digest not in _sizes:
+                try:
+                    _sizes[digest] = os.path.getsize(_object_path(digest))
+                except OSError:
+                    continue
+                _total_bytes += _sizes[digest]
+            _refs[digest] = _refs.get(digest, 0) + 1
+            _index.append(entry)
+
+def store(url: str, body: bytes, digest: str, encoding: Optional[str] = None) -> Optional[dict]:
+    """归档一次抓取；正文已存在时只追加索引。归档关闭时返回 None"""
+    global _total_bytes
+    if not ENABLED:
+        return None
+    with _lock:
+        _ensure_loaded()
+        path = _object_path(digest)
+        stored = digest not in _sizes
+        if stored:
+            data = zstandard.ZstdCompressor(level=ARCHIVE_ZSTD_LEVEL).compress(body)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = path + ".tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+            _sizes[digest] = len(data)
+            _total_bytes += len(data)
+        entry = {
+            "url": url,
+            "hash": digest,
+            "encoding": encoding,
+            "fetched_at": datetime.now().isoformat(timespec="seconds"),
+            "size": len(body),
+            "stored": _sizes[digest],
+        }
+        _refs[digest] = _refs.get(digest, 0) + 1
+        _index.append(entry)
+        with open(_index_path(), "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        if _total_bytes > ARCHIVE_MAX_BYTES:
+            _enforce_retention()
+        return entry
+
+def _enforce_retention() -> None:
+    """从最旧的索引记录开始删除，直到对象总字节数不超过上限（至少保留最新一条），然后重写索引"""
+    global _total_bytes, _index
+    drop = 0
+    while _total_bytes > ARCHIVE_MAX_BYTES and drop < len(_index) - 1:
+        digest = _index[drop]["hash"]
+        drop += 1
+        _refs[digest] -= 1
+        if _refs[digest] == 0:
+            del _refs[digest]
+            size = _sizes.pop(digest)
+            _total_bytes -= size
+            _evicted["objects"] += 1
+            _evicted["bytes"] += size
+            try:
+                os.remove(_object_path(digest))
+            except OSError:
+                pass
+    _evicted["entries"] += drop
+    _index = _index[drop:]
+    tmp_path = _index_path() + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        for entry in _index:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+    os.replace(tmp_path, _index_path())
+
+def read(digest: str) -> bytes:
+    """读取并解压一个对象"""
+    with open(_object_path(digest), "rb") as f:
+        return zstandard.ZstdDecompressor().decompress(f.read())
+
+def entries(url: Optional[str] = None, since: Optional[str] = None, latest_only: bool = False) -> Iterator[dict]:
+    """按抓取时间顺序遍历索引；latest_only 时每个 URL 只取最近一次抓取"""
+    with _lock:
+        _ensure_loaded()
+        selected = [
+            e for e in _index
+            if (url is None or e["url"] == url) and (since is None or e["fetched_at"] >= since)
+        ]
+    if latest_only:
+        latest = {e["url"]: e for e in selected}
+        selected = [e for e in selected if latest[e["url"]] is e]
+    return iter(selected)
+
+def stats() -> dict:
+    with _lock:
+        _ensure_loaded()
+        # 未压缩的正文字节数（每个对象计一次）
+        raw_bytes = sum({e["hash"]: e["size"] for e in _index}.values())
+        return {
+            "enabled": ENABLED,
+            "dir": ARCHIVE_DIR,
+            "entries": len(_index),
+            "urls": len({e["url"] for e in _index}),
+            "objects": len(_sizes),
+            "bytes": _total_bytes,
+            "raw_bytes": raw_bytes,
+            "max_bytes": ARCHIVE_MAX_BYTES,
+            "evicted": dict(_evicted),
+        }
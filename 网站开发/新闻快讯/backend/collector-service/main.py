@@ -1,29 +1,312 @@
-from fastapi import FastAPI
-import requests
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import Response, StreamingResponse
+from pydantic import BaseModel
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional
+from collections import OrderedDict
 from bs4 import BeautifulSoup
+from datetime import datetime
+import asyncio
+import hashlib
+import httpx
+import json
+import logging
+import os
+import sys
+import urllib.parse
 
-app = FastAPI()
+# 共享的指标采集模块位于 backend/common
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "common"))
+from instrumentation import instrument_app, track_downstream
+from compression import CompressionMiddleware
+import charset
+# 本服务目录（网关进程内模式按路径加载本模块时不在 sys.path 中）
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import archive
 
-@app.get("/collect")
-def collect_data(url: str):
+logger = logging.getLogger("collector-service")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    _get_client()
     try:
-        response = requests.get(url)
-        response.raise_for_status()  # Raise an exception for bad status codes
-        
-        return {
+        yield
+    finally:
+        await _close_client()
+
+app = FastAPI(lifespan=lifespan)
+instrument_app(app, "collector")
+app.add_middleware(CompressionMiddleware)
+
+# ===== 抓取客户端 =====
+# 复用一个异步连接池；显式的连接/读取超时；同一站点的并发抓取数受限，避免单个慢站点占满连接或被对方限流。
+FETCH_TIMEOUT_SECONDS = float(os.getenv("COLLECTOR_TIMEOUT_SECONDS", "15"))
+FETCH_CONNECT_TIMEOUT_SECONDS = float(os.getenv("COLLECTOR_CONNECT_TIMEOUT_SECONDS", "5"))
+MAX_CONNECTIONS = int(os.getenv("COLLECTOR_MAX_CONNECTIONS", "100"))
+PER_HOST_CONCURRENCY = int(os.getenv("COLLECTOR_PER_HOST_CONCURRENCY", "4"))
+BATCH_MAX_URLS = int(os.getenv("COLLECTOR_BATCH_MAX_URLS", "200"))
+# 单个页面正文上限（解压后字节数），超出即中止下载
+MAX_BODY_BYTES = int(os.getenv("COLLECTOR_MAX_BODY_BYTES", str(5 * 1024 * 1024)))
+USER_AGENT = os.getenv("COLLECTOR_USER_AGENT", "Mozilla/5.0 (compatible; NewsCollector/1.0)")
+
+_client: Optional[httpx.AsyncClient] = None
+_host_semaphores: Dict[str, asyncio.Semaphore] = {}
+
+def _get_client() -> httpx.AsyncClient:
+    """获取复用的抓取客户端；未经 lifespan（如网关进程内调用）时按需创建"""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            follow_redirects=True,
+            headers={"User-Agent": USER_AGENT},
+            limits=httpx.Limits(max_connections=MAX_CONNECTIONS, max_keepalive_connections=MAX_CONNECTIONS // 2),
+            timeout=httpx.Timeout(FETCH_TIMEOUT_SECONDS, connect=FETCH_CONNECT_TIMEOUT_SECONDS),
+        )
+    return _client
+
+async def _close_client():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+def _host_semaphore(url: str) -> asyncio.Semaphore:
+    host = (urllib.parse.urlsplit(url).hostname or "").lower()
+    semaphore = _host_semaphores.get(host)
+    if semaphore is None:
+        semaphore = _host_semaphores[host] = asyncio.Semaphore(PER_HOST_CONCURRENCY)
+    return semaphore
+
+def _deadline_timeout(request: Request) -> Optional[httpx.Timeout]:
+    """网关通过 X-Request-Deadline-Ms 传来剩余时间时，抓取超时不超过该值"""
+    remaining_ms = request.headers.get("x-request-deadline-ms")
+    if not remaining_ms or not remaining_ms.isdigit():
+        return None
+    timeout = min(FETCH_TIMEOUT_SECONDS, max(int(remaining_ms) / 1000, 0.001))
+    return httpx.Timeout(timeout, connect=min(FETCH_CONNECT_TIMEOUT_SECONDS, timeout))
+
+# ===== 未变化页面短路 =====
+# 记住每个 URL 上次的 ETag / Last-Modified 与正文摘要：下次抓取发送条件请求，304 或正文摘要相同时
+# 返回 {"unchanged": true} 而不返回正文，网关据此跳过解析、清洗与入库。force=true 可跳过比对强制返回正文。
+# commit=false 时新的校验信息先放入待确认表，调用方入库成功后经 POST /collect/commit 确认才生效；
+# 下游任一步失败则不确认，下次抓取仍按"已变化"返回正文，不会因校验信息已更新而被永久跳过。
+VALIDATOR_CACHE_SIZE = int(os.getenv("COLLECTOR_VALIDATOR_CACHE_SIZE", "1000"))
+_validators: "OrderedDict[str, dict]" = OrderedDict()
+_pending_validators: "OrderedDict[str, dict]" = OrderedDict()
+# 每个 URL 的抓取统计：not_modified 为 304 命中，same_hash 为 200 但正文未变
+fetch_stats: Dict[str, Dict[str, int]] = {}
+
+def _conditional_headers(url: str) -> dict:
+    stored = _validators.get(url)
+    if stored is None:
+        return {}
+    headers = {}
+    if stored.get("etag"):
+        headers["If-None-Match"] = stored["etag"]
+    if stored.get("last_modified"):
+        headers["If-Modified-Since"] = stored["last_modified"]
+    return headers
+
+def _remember(url: str, response: httpx.Response, digest: bytes, commit: bool = True) -> None:
+    if commit:
+        _pending_validators.pop(url, None)
+    table = _validators if commit else _pending_validators
+    table[url] = {
+        "etag": response.headers.get("etag"),
+        "last_modified": response.headers.get("last-modified"),
+        "digest": digest,
+    }
+    table.move_to_end(url)
+    while len(table) > VALIDATOR_CACHE_SIZE:
+        table.popitem(last=False)
+
+def commit_validator(url: str, digest: str) -> bool:
+    """确认某 URL 待生效的校验信息；digest 与最近一次抓取不一致（期间又抓到了新内容）时不生效"""
+    pending = _pending_validators.get(url)
+    if pending is None or pending["digest"].hex() != digest:
+        return False
+    del _pending_validators[url]
+    _validators[url] = pending
+    _validators.move_to_end(url)
+    while len(_validators) > VALIDATOR_CACHE_SIZE:
+        _validators.popitem(last=False)
+    return True
+
+def _count(url: str, outcome: str) -> None:
+    stats = fetch_stats.get(url)
+    if stats is None:
+        stats = fetch_stats[url] = {"requests": 0, "not_modified": 0, "same_hash": 0, "changed": 0, "errors": 0}
+    stats["requests"] += 1
+    stats[outcome] += 1
+
+class BodyTooLarge(Exception):
+    pass
+
+async def _read_body(response: httpx.Response) -> bytes:
+    """流式读取正文，超过 MAX_BODY_BYTES 立即中止"""
+    declared = response.headers.get("content-length")
+    if declared and declared.isdigit() and int(declared) > MAX_BODY_BYTES and "content-encoding" not in response.headers:
+        raise BodyTooLarge(f"Body too large: {declared} bytes (max {MAX_BODY_BYTES})")
+    body = bytearray()
+    async for chunk in response.aiter_bytes():
+        body += chunk
+        if len(body) > MAX_BODY_BYTES:
+            raise BodyTooLarge(f"Body too large: more than {MAX_BODY_BYTES} bytes")
+    return bytes(body)
+
+async def fetch(url: str, timeout: Optional[httpx.Timeout] = None, force: bool = False, decode: bool = True, commit: bool = True) -> dict:
+    """抓取单个 URL；失败时返回 success=False 与错误信息，不抛异常。
+
+    decode=True 时按识别出的字符集解码为 content；否则返回原始字节 body 与 encoding，由解析方解码。
+    commit=False 时内容变化的校验信息待 commit_validator 确认后才生效，结果中带 digest 供确认。
+    """
+    try:
+        headers = {} if force else _conditional_headers(url)
+        async with _host_semaphore(url):
+            with track_downstream("fetch"):
+                async with _get_client().stream("GET", url, headers=headers, timeout=timeout or httpx.USE_CLIENT_DEFAULT) as response:
+                    if response.status_code == 304 and headers:
+                        _validators.move_to_end(url)
+                        _count(url, "not_modified")
+                        return {"success": True, "unchanged": True, "reason": "not_modified", "url": url, "status_code": 304}
+                    response.raise_for_status()  # Raise an exception for bad status codes
+                    body = await _read_body(response)
+
+        digest = hashlib.blake2b(body, digest_size=16).digest()
+        stored = _validators.get(url)
+        unchanged = not force and stored is not None and stored["digest"] == digest
+        _remember(url, response, digest, commit=commit or unchanged)
+        if unchanged:
+            _count(url, "same_hash")
+            return {"success": True, "unchanged": True, "reason": "same_hash", "url": url, "status_code": response.status_code}
+        _count(url, "changed")
+        encoding, source = charset.detect(response.headers.get("content-type"), body)
+        if archive.ENABLED:
+            try:
+                await asyncio.to_thread(archive.store, url, body, digest.hex(), encoding)
+            except OSError as e:
+                # 归档失败（如磁盘已满）不影响本次抓取
+                logger.warning("归档页面出错 %s: %s", url, e)
+        result = {
             "success": True,
-            "content": response.text,
+            "unchanged": False,
             "url": url,
-            "status_code": response.status_code
+            "status_code": response.status_code,
+            "encoding": encoding,
+            "charset_source": source,
+            "digest": digest.hex(),
         }
-    except requests.exceptions.RequestException as e:
+        if decode:
+            result["content"] = charset.decode(body, encoding)
+        else:
+            result["body"] = body
+        return result
+    except (httpx.HTTPError, httpx.InvalidURL, BodyTooLarge) as e:
+        _count(url, "errors")
         return {
             "success": False,
-            "error": str(e),
+            "error": str(e) or type(e).__name__,
             "url": url
         }
 
+class BatchCollectRequest(BaseModel):
+    urls: List[str]
+    force: bool = False
+
+class CommitItem(BaseModel):
+    url: str
+    digest: str
+
+@app.get("/collect")
+async def collect_data(url: str, request: Request, force: bool = False):
+    return await fetch(url, _deadline_timeout(request), force=force)
+
+@app.get("/collect/raw")
+async def collect_raw(url: str, request: Request, force: bool = False, commit: bool = True):
+    """抓取并原样返回正文字节，识别出的字符集放在 X-Content-Charset 头中，避免 HTML 经 JSON 转义。
+
+    页面未变化时返回空正文与 X-Unchanged 头；抓取失败返回 424 与错误信息。正文摘要放在 X-Content-Digest 头中。
+    """
+    result = await fetch(url, _deadline_timeout(request), force=force, decode=False, commit=commit)
+    if not result["success"]:
+        raise HTTPException(status_code=424, detail=result["error"])
+    if result["unchanged"]:
+        return Response(status_code=200, headers={"X-Unchanged": result["reason"]})
+    return Response(
+        content=result["body"],
+        media_type="application/octet-stream",
+        headers={
+            "X-Content-Charset": result["encoding"],
+            "X-Charset-Source": result["charset_source"],
+            "X-Source-Status": str(result["status_code"]),
+            "X-Content-Digest": result["digest"],
+        },
+    )
+
+@app.post("/collect/commit")
+def collect_commit(items: List[CommitItem]):
+    """确认以 commit=false 抓取的页面已处理完毕（入库成功），其校验信息从此生效"""
+    committed = sum(1 for item in items if commit_validator(item.url, item.digest))
+    return {"committed": committed, "total": len(items)}
+
+@app.get("/collect/stats")
+def collect_stats():
+    """按 URL（即新闻源）统计未变化命中率"""
+    feeds = {}
+    for url, stats in fetch_stats.items():
+        hits = stats["not_modified"] + stats["same_hash"]
+        fetched = stats["requests"] - stats["errors"]
+        feeds[url] = {**stats, "hit_rate": round(hits / fetched, 4) if fetched else 0.0}
+    total_hits = sum(s["not_modified"] + s["same_hash"] for s in fetch_stats.values())
+    total_fetched = sum(s["requests"] - s["errors"] for s in fetch_stats.values())
+    return {
+        "feeds": feeds,
+        "tracked_urls": len(_validators),
+        "pending_urls": len(_pending_validators),
+        "hit_rate": round(total_hits / total_fetched, 4) if total_fetched else 0.0,
+    }
+
+@app.post("/collect/batch")
+async def collect_batch(request: BatchCollectRequest, http_request: Request):
+    """并发抓取多个 URL，按完成顺序以 NDJSON 逐行返回（每行带请求中的序号 index）"""
+    if not request.urls:
+        raise HTTPException(status_code=400, detail="No urls provided")
+    if len(request.urls) > BATCH_MAX_URLS:
+        raise HTTPException(status_code=400, detail=f"Too many urls (max {BATCH_MAX_URLS})")
+
+    timeout = _deadline_timeout(http_request)
+
+    async def fetch_indexed(index: int, url: str) -> dict:
+        return {"index": index, **await fetch(url, timeout, force=request.force)}
+
+    async def lines():
+        tasks = [asyncio.ensure_future(fetch_indexed(i, url)) for i, url in enumerate(request.urls)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                result = await next_done
+                yield json.dumps(result, ensure_ascii=False) + "\n"
+        finally:
+            # 客户端中途断开时取消尚未完成的抓取
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+@app.get("/archive")
+def archive_entries(url: str, limit: int = 20):
+    """查看某个 URL 最近若干次抓取的归档记录"""
+    return {"url": url, "entries": list(archive.entries(url=url))[-limit:]}
+
+@app.get("/archive/stats")
+def archive_stats():
+    return archive.stats()
+
+@app.get("/health")
+def health_check():
+    """健康检查"""
+    return {"status": "healthy", "service": "collector", "timestamp": datetime.now().isoformat()}
+
 if __name__ == "__main__":
     import uvicorn
     # 统一端口：collector 使用 8005，避免与 cleaner (8004) 冲突
-    uvicorn.run(app, host="0.0.0.0", port=8005)
\ No newline at end of file
+    uvicorn.run(app, host="0.0.0.0", port=8005)
@@ -0,0 +1,72 @@
+"""网页字符集识别：按 BOM、HTTP 头、文档开头几 KB 内的 <meta> / XML 声明依次判断，不做全文统计检测。
+
+国内门户常只在 <meta> 中声明 GBK/GB2312，这里统一映射为其超集 GB18030。
+"""
+import codecs
+import re
+from typing import Optional, Tuple
+
+SNIFF_BYTES = 4096
+
+_BOMS = (
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+)
+_HEADER_RE = re.compile(r"charset\s*=\s*[\"']?\s*([\w.:\-]+)", re.I)
+_META_RE = re.compile(rb"<meta[^>]+?charset\s*=\s*[\"']?\s*([\w.:\-]+)", re.I)
+_XML_RE = re.compile(rb"^\s*<\?xml[^>]+?encoding\s*=\s*[\"']([\w.:\-]+)", re.I)
+
+# 与浏览器一致的别名处理：GBK 系列按 GB18030 解码，Latin-1/ASCII 按 Windows-1252 解码
+_ALIASES = {
+    "gb2312": "gb18030",
+    "gbk": "gb18030",
+    "x-gbk": "gb18030",
+    "cp936": "gb18030",
+    "iso-8859-1": "cp1252",
+    "latin1": "cp1252",
+    "latin-1": "cp1252",
+    "us-ascii": "cp1252",
+    "ascii": "cp1252",
+}
+
+def normalize(name: Optional[str]) -> Optional[str]:
+    """规范化字符集名称；无法识别时返回 None"""
+    if not name:
+        return None
+    name = name.strip().strip("\"'").lower()
+    name = _ALIASES.get(name, name)
+    try:
+        return codecs.lookup(name).name
+    except LookupError:
+        return None
+
+def detect(content_type: Optional[str], body: bytes, default: str = "utf-8") -> Tuple[str, str]:
+    """返回 (编码, 来源)，来源为 bom / header / meta / default"""
+    for bom, encoding in _BOMS:
+        if body.startswith(bom):
+            return encoding, "bom"
+    if content_type:
+        match = _HEADER_RE.search(content_type)
+        encoding = normalize(match.group(1)) if match else None
+        if encoding:
+            return encoding, "header"
+    head = body[:SNIFF_BYTES]
+    match = _XML_RE.match(head) or _META_RE.search(head)
+    encoding = normalize(match.group(1).decode("ascii", "ignore")) if match else None
+    if encoding:
+        return encoding, "meta"
+    return default, "default"
+
+def decode(body: bytes, encoding: Optional[str], fallback: Optional[str] = "gb18030") -> str:
+    """按已识别的编码解码一次；未声明编码（按默认 UTF-8）且解码失败时再尝试 fallback，仍失败则替换非法字节"""
+    encoding = normalize(encoding) or "utf-8"
+    try:
+        return body.decode(encoding)
+    except UnicodeDecodeError:
+        if fallback and encoding in ("utf-8", "utf-8-sig"):
+            try:
+                return body.decode(fallback)
+            except UnicodeDecodeError:
+                pass
+        return body.decode(encoding, errors="replace")
@@ -0,0 +1,232 @@
+"""各服务共用的压缩：按 Accept-Encoding 协商 zstd / br / gzip 压缩响应，并解压带 Content-Encoding 的请求体。
+
+brotli、zstandard 为可选依赖，安装后自动启用；gzip 始终可用。
+环境变量：
+- COMPRESSION_MIN_SIZE：小于该字节数的响应不压缩（默认 1024）
+- COMPRESSION_ENCODINGS：服务端偏好顺序（默认 zstd,br,gzip）
+- COMPRESSION_MAX_REQUEST_BYTES：请求体解压后的上限（默认 20MB），超出返回 413
+"""
+import io
+import os
+import zlib
+from typing import Optional
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+MAX_REQUEST_BYTES = int(os.getenv("COMPRESSION_MAX_REQUEST_BYTES", str(20 * 1024 * 1024)))
+# 偏向低延迟的压缩级别：与默认最高级别相比体积相差不大，CPU 开销低得多
+GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "5"))
+BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4"))
+ZSTD_LEVEL = int(os.getenv("COMPRESSION_ZSTD_LEVEL", "3"))
+
+_installed = {"gzip": True, "br": brotli is not None, "zstd": zstandard is not None}
+AVAILABLE_ENCODINGS = [
+    e.strip() for e in os.getenv("COMPRESSION_ENCODINGS", "zstd,br,gzip").split(",")
+    if _installed.get(e.strip())
+]
+
+# 已压缩或流式推送的内容类型不再压缩
+SKIP_CONTENT_TYPES = ("text/event-stream", "image/", "video/", "audio/", "application/zip", "application/gzip")
+
+def choose_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """按客户端 q 值选择编码，q 值相同时按服务端偏好顺序"""
+    if not accept_encoding:
+        return None
+    weights = {}
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[name.strip()] = q
+    best, best_q = None, 0.0
+    for encoding in AVAILABLE_ENCODINGS:
+        q = weights.get(encoding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+def compress(data: bytes, encoding: str) -> bytes:
+    if encoding == "gzip":
+        compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+        return compressor.compress(data) + compressor.flush()
+    if encoding == "br":
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    raise ValueError(f"unsupported encoding: {encoding}")
+
+def decompress(data: bytes, encoding: str, max_size: int = MAX_REQUEST_BYTES) -> bytes:
+    """解压并限制输出大小，防止压缩炸弹；超出上限抛出 ValueError"""
+    if encoding == "gzip":
+        decompressor = zlib.decompressobj(47)
+        result = decompressor.decompress(data, max_size + 1)
+    elif encoding == "br" and brotli is not None:
+        try:
+            result = brotli.Decompressor().process(data, output_buffer_limit=max_size + 1)
+        except TypeError:
+            # brotli < 1.2 不支持输出上限
+            result = brotli.decompress(data)
+    elif encoding == "zstd" and zstandard is not None:
+        with zstandard.ZstdDecompressor().stream_reader(io.BytesIO(data)) as reader:
+            result = reader.read(max_size + 1)
+    else:
+        raise ValueError(f"unsupported encoding: {encoding}")
+    if len(result) > max_size:
+        raise ValueError("decompressed body too large")
+    return result
+
+class _StreamCompressor:
+    """流式响应的增量压缩：每个分块压缩后立即 flush，保证下游能逐块收到"""
+    def __init__(self, encoding: str):
+        if encoding == "gzip":
+            self._obj = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+            self.compress = lambda chunk: self._obj.compress(chunk) + self._obj.flush(zlib.Z_SYNC_FLUSH)
+            self.finish = self._obj.flush
+        elif encoding == "br":
+            self._obj = brotli.Compressor(quality=BROTLI_QUALITY)
+            self.compress = lambda chunk: self._obj.process(chunk) + self._obj.flush()
+            self.finish = self._obj.finish
+        else:
+            self._obj = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+            self.compress = lambda chunk: self._obj.compress(chunk) + self._obj.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+            self.finish = self._obj.flush
+
+def _header(headers, name: bytes) -> Optional[bytes]:
+    for key, value in headers:
+        if key.lower() == name:
+            return value
+    return None
+
+class CompressionMiddleware:
+    """纯 ASGI 中间件：压缩响应体（单块响应低于阈值不压缩），解压带 Content-Encoding 的请求体"""
+    def __init__(self, app, minimum_size: int = MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        request_encoding = _header(scope["headers"], b"content-encoding")
+        if request_encoding and request_encoding.strip().lower() != b"identity":
+            receive = await self._decoded_receive(scope, receive, send, request_encoding.decode().strip().lower())
+            if receive is None:
+                return
+        encoding = choose_encoding((_header(scope["headers"], b"accept-encoding") or b"").decode())
+        if encoding is None or scope["method"] == "HEAD":
+            return await self.app(scope, receive, send)
+        await self.app(scope, receive, _CompressingSender(send, encoding, self.minimum_size))
+
+    async def _decoded_receive(self, scope, receive, send, encoding: str):
+        chunks = []
+        while True:
+            message = await receive()
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body"):
+                break
+        try:
+            body = decompress(b"".join(chunks), encoding)
+        except ValueError as e:
+            status = 413 if "too large" in str(e) else 415
+            await _plain_response(send, status, str(e))
+            return None
+        except Exception:
+            await _plain_response(send, 400, "invalid compressed body")
+            return None
+        # 下游看到的是解压后的请求：去掉 Content-Encoding，修正 Content-Length
+        scope["headers"] = [
+            (k, v) for k, v in scope["headers"] if k.lower() not in (b"content-encoding", b"content-length")
+        ] + [(b"content-length", str(len(body)).encode())]
+        delivered = False
+
+        async def decoded_receive():
+            nonlocal delivered
+            if delivered:
+                return await receive()
+            delivered = True
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        return decoded_receive
+
+async def _plain_response(send, status: int, text: str):
+    body = text.encode()
+    await send({"type": "http.response.start", "status": status,
+                "headers": [(b"content-type", b"text/plain; charset=utf-8"), (b"content-length", str(len(body)).encode())]})
+    await send({"type": "http.response.body", "body": body})
+
+class _CompressingSender:
+    def __init__(self, send, encoding: str, minimum_size: int):
+        self.send = send
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.start = None
+        self.active = None  # None：尚未决定；False：原样透传；否则为流式压缩器
+
+    async def __call__(self, message):
+        if message["type"] == "http.response.start":
+            self.start = message
+            headers = message.get("headers", [])
+            content_type = (_header(headers, b"content-type") or b"").decode().lower()
+            length = _header(headers, b"content-length")
+            if (_header(headers, b"content-encoding") or message["status"] in (204, 304)
+                    or content_type.startswith(SKIP_CONTENT_TYPES)
+                    or (length is not None and length.isdigit() and int(length) < self.minimum_size)):
+                self.active = False
+                await self.send(message)
+            return
+        if message["type"] != "http.response.body":
+            return await self.send(message)
+        if self.active is False:
+            return await self.send(message)
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self.active is None:
+            if not more_body:
+                # 单块响应：低于阈值原样返回，否则整体压缩并改写 Content-Length
+                if len(body) < self.minimum_size:
+                    self.active = False
+                    await self.send(self.start)
+                    return await self.send(message)
+                compressed = compress(body, self.encoding)
+                await self.send(self._compressed_start(len(compressed)))
+                return await self.send({"type": "http.response.body", "body": compressed})
+            self.active = _StreamCompressor(self.encoding)
+            await self.send(self._compressed_start(None))
+        chunk = self.active.compress(body) if body else b""
+        if not more_body:
+            chunk += self.active.finish()
+        await self.send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+    def _compressed_start(self, length: Optional[int]):
+        headers = []
+        for key, value in self.start.get("headers", []):
+            lower = key.lower()
+            if lower == b"content-length":
+                continue
+            if lower == b"etag" and not value.startswith(b"W/"):
+                # 压缩后字节不同，强校验器降为弱校验器
+                value = b"W/" + value
+            headers.append((key, value))
+        headers.append((b"content-encoding", self.encoding.encode()))
+        vary = _header(headers, b"vary")
+        if vary is None:
+            headers.append((b"vary", b"Accept-Encoding"))
+        elif b"accept-encoding" not in vary.lower():
+            headers = [(k, v + b", Accept-Encoding" if k.lower() == b"vary" else v) for k, v in headers]
+        if length is not None:
+            headers.append((b"content-length", str(length).encode()))
+        return {**self.start, "headers": headers}
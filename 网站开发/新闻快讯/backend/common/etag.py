@@ -0,0 +1,45 @@
+"""条件请求（ETag）：新闻、分类服务的读接口共用。
+
+弱 ETag = 启动标识 + 存储版本号 + 查询（路径与排序后的参数）摘要，任何写操作递增版本号即令其失效。
+启动标识在进程启动时随机生成：未开启快照时版本号每次重启都从同一值开始，
+没有它的话客户端缓存的旧 ETag 可能在重启后命中内容已不同的响应。
+"""
+import os
+import urllib.parse
+import zlib
+from typing import Optional
+
+from starlette.requests import Request
+from starlette.responses import Response
+
+BOOT_NONCE = os.urandom(4).hex()
+
+def etag_for(request: Request, version: int) -> str:
+    query = urllib.parse.urlencode(sorted(request.query_params.multi_items()))
+    digest = zlib.crc32(f"{request.url.path}?{query}".encode())
+    return f'W/"{BOOT_NONCE}-{version}-{digest:08x}"'
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """按弱比较判断 If-None-Match 是否命中"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+def conditional(request: Request, response: Response, version: int) -> Optional[Response]:
+    """设置 ETag；若客户端缓存仍有效则返回 304 响应，否则返回 None"""
+    etag = etag_for(request, version)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
@@ -0,0 +1,192 @@
+"""各服务共用的指标采集：按路由的请求耗时直方图、进行中请求数、下游调用耗时、Server-Timing 响应头与 Prometheus /metrics。
+
+用法（服务 main.py）：
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "common"))
+    from instrumentation import instrument_app, observe_downstream
+    instrument_app(app, "news")
+
+热路径上只有两次 perf_counter、一次二分查找和几次字典访问，不加锁（计数在 GIL 下足够准确）。
+"""
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.routing import Match
+
+# 单位：秒；覆盖本地调用的毫秒级到采集外部站点的数十秒
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, label_names: Tuple[str, ...], buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = tuple(buckets)
+        # 标签值 -> [各桶计数（非累计，末位为 +Inf）, 总和, 次数]
+        self.series: Dict[tuple, list] = {}
+
+    def observe(self, labels: tuple, value: float) -> None:
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for labels, (counts, total, count) in self.series.items():
+            label_text = _labels(self.label_names, labels)
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f'{self.name}_bucket{{{label_text},le="{le}"}} {cumulative}')
+            lines.append(f"{self.name}_sum{{{label_text}}} {total}")
+            lines.append(f"{self.name}_count{{{label_text}}} {count}")
+        return lines
+
+class Gauge:
+    def __init__(self, name: str, help_text: str, label_names: Tuple[str, ...]):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.values: Dict[tuple, float] = {}
+
+    def inc(self, labels: tuple, amount: float = 1) -> None:
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def dec(self, labels: tuple, amount: float = 1) -> None:
+        self.values[labels] = self.values.get(labels, 0) - amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} gauge"]
+        for labels, value in self.values.items():
+            lines.append(f"{self.name}{{{_labels(self.label_names, labels)}}} {value}")
+        return lines
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(names: Tuple[str, ...], values: tuple) -> str:
+    return ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "HTTP request duration by route.", ("service", "method", "route", "status"))
+REQUESTS_IN_FLIGHT = Gauge(
+    "http_requests_in_flight", "HTTP requests currently being served.", ("service",))
+DOWNSTREAM_DURATION = Histogram(
+    "downstream_request_duration_seconds", "Duration of calls to downstream services.", ("service", "target", "outcome"))
+DOWNSTREAM_IN_FLIGHT = Gauge(
+    "downstream_requests_in_flight", "Downstream calls currently in progress.", ("service", "target"))
+METRICS = [REQUEST_DURATION, REQUESTS_IN_FLIGHT, DOWNSTREAM_DURATION, DOWNSTREAM_IN_FLIGHT]
+
+# 当前请求内的下游耗时记录，写入 Server-Timing；列表在请求开始时创建，子任务与线程池共享同一对象
+_server_timings: ContextVar[Optional[list]] = ContextVar("server_timings", default=None)
+_service_name: Optional[str] = None
+
+def observe_downstream(target: str, seconds: float, outcome: str = "ok") -> None:
+    """记录一次下游调用（HTTP 或进程内阶段）的耗时"""
+    DOWNSTREAM_DURATION.observe((_service_name or "app", target, outcome), seconds)
+    timings = _server_timings.get()
+    if timings is not None:
+        timings.append((target, seconds))
+
+class track_downstream:
+    """记录下游调用耗时与进行中数量的上下文管理器；抛出异常或调用方把 outcome 设为 "error" 时记为失败"""
+    __slots__ = ("target", "started", "outcome")
+
+    def __init__(self, target: str):
+        self.target = target
+        self.outcome = "ok"
+
+    def __enter__(self):
+        DOWNSTREAM_IN_FLIGHT.inc((_service_name or "app", self.target))
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        DOWNSTREAM_IN_FLIGHT.dec((_service_name or "app", self.target))
+        observe_downstream(self.target, time.perf_counter() - self.started, "error" if exc_type is not None else self.outcome)
+        return False
+
+def _server_timing_header(total: float, timings: list) -> bytes:
+    parts = [f"app;dur={total * 1000:.1f}"]
+    # 同一目标多次调用（重试、批量）合并为一项并带上次数
+    merged: Dict[str, list] = {}
+    for target, seconds in timings:
+        entry = merged.setdefault(target, [0.0, 0])
+        entry[0] += seconds
+        entry[1] += 1
+    for target, (seconds, count) in merged.items():
+        desc = f';desc="x{count}"' if count > 1 else ""
+        parts.append(f"{target};dur={seconds * 1000:.1f}{desc}")
+    return ", ".join(parts).encode()
+
+class MetricsMiddleware:
+    """纯 ASGI 中间件：统计请求耗时与进行中数量，并在响应头中附加 Server-Timing"""
+    def __init__(self, app, service: str):
+        self.app = app
+        self.service = service
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        started = time.perf_counter()
+        timings: list = []
+        token = _server_timings.set(timings)
+        status = 500
+        in_flight = (self.service,)
+        REQUESTS_IN_FLIGHT.inc(in_flight)
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", _server_timing_header(time.perf_counter() - started, timings)))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            REQUESTS_IN_FLIGHT.dec(in_flight)
+            _server_timings.reset(token)
+            # 使用路由模板而非原始路径作为标签，避免 /news/{id} 之类的路径撑爆序列数
+            route_path = _route_template(scope)
+            REQUEST_DURATION.observe((self.service, scope["method"], route_path, str(status)), time.perf_counter() - started)
+
+def _route_template(scope) -> str:
+    """请求对应的路由模板。FastAPI 的 APIRoute 会写入 scope["route"]；add_route 注册的普通 Route（如 /metrics）不会，
+    此时按应用路由表重新匹配一次"""
+    route = scope.get("route")
+    if getattr(route, "path", None):
+        return route.path
+    app = scope.get("app")
+    for candidate in getattr(getattr(app, "router", None), "routes", ()):
+        match, _ = candidate.matches(scope)
+        if match != Match.NONE:
+            return getattr(candidate, "path", None) or "unmatched"
+    return "unmatched"
+
+def render_metrics() -> str:
+    lines: List[str] = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+async def metrics_endpoint(request: Request) -> Response:
+    return Response(render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+def instrument_app(app, service: str) -> None:
+    """为 FastAPI 应用挂载指标中间件与 GET /metrics"""
+    global _service_name
+    # 进程内流水线模式下网关会加载其他服务的 main.py，下游指标仍归属最先注册的服务
+    if _service_name is None:
+        _service_name = service
+    app.add_middleware(MetricsMiddleware, service=service)
+    app.add_route("/metrics", metrics_endpoint, methods=["GET"], include_in_schema=False)
@@ -1,18 +1,65 @@
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import FastAPI, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import List, Optional, Dict
-from datetime import datetime
+from datetime import datetime, timedelta
+from contextlib import asynccontextmanager
+from collections import deque
 import uuid
 import asyncio
 import os
+import sys
 import json
+import logging
+import mmap
+from array import array
+import struct
+import time
+import threading
 import urllib.parse
 
 # 外部依赖：抓取与解析、翻译
 import httpx
 from bs4 import BeautifulSoup
 
-app = FastAPI()
+# 共享的指标采集模块位于 backend/common
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "common"))
+from instrumentation import instrument_app
+from compression import CompressionMiddleware
+import etag
+
+logger = logging.getLogger("news-service")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global _change_loop, _change_event
+    # 变更订阅在事件循环中等待，写操作可能来自线程池，需记录循环以便跨线程唤醒
+    _change_loop = asyncio.get_running_loop()
+    _change_event = asyncio.Event()
+    # 先从快照与预写日志恢复，再开始接受写入
+    if SNAPSHOT_PATH:
+        restore = restore_store()
+        _open_wal()
+        if restore["seeded"]:
+            # 首次启动：内置样例数据既不在快照也不在日志中，先写一次快照，否则下次启动重放日志时会丢失
+            write_snapshot()
+    # 启动后台任务：定期按保留策略压缩存储、定期写快照
+    tasks = [asyncio.create_task(_retention_loop())]
+    if SNAPSHOT_PATH:
+        tasks.append(asyncio.create_task(_snapshot_loop()))
+    try:
+        yield
+    finally:
+        for task in tasks:
+            task.cancel()
+        if SNAPSHOT_PATH:
+            # 退出前写最后一次快照，下次启动无需重放日志
+            write_snapshot()
+            _close_wal()
+
+app = FastAPI(lifespan=lifespan)
+instrument_app(app, "news")
+app.add_middleware(CompressionMiddleware)
 
 # 数据模型
 class NewsItem(BaseModel):
@@ -54,8 +101,181 @@ class NewsUpdate(BaseModel):
     significance_score: Optional[float] = None
     significance_factors: Optional[Dict[str, float]] = None
 
+# ===== 紧凑记录 =====
+# 存储中的新闻不再是 15 个键的 dict：使用 __slots__ 记录，重复出现的分类型字段驻留，
+# 时间戳存为整数秒，七因子打包为定长 double。对外仍通过 to_dict() 还原为 NewsItem 结构。
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+FACTOR_NAMES = ("scale", "impact", "novelty", "potential", "legacy", "positivity", "credibility")
+_FACTORS_STRUCT = struct.Struct("<7d")
+
+def _intern(value: Optional[str]) -> Optional[str]:
+    return sys.intern(value) if value else value
+
+# 存储中的时间都是不带时区的本地时间，按“自 1970-01-01 起的秒数”打包，避免每次换算时区
+_EPOCH = datetime(1970, 1, 1)
+
+def _to_seconds(dt: datetime) -> int:
+    return int((dt - _EPOCH).total_seconds())
+
+def _pack_time(value: Optional[str]):
+    """标准格式时间转为整数秒；无法解析的原样保留字符串"""
+    if not value:
+        return None
+    # fromisoformat 远快于 strptime；先按长度与分隔符确认是 TIME_FORMAT 格式
+    if isinstance(value, str) and len(value) == 19 and value[10] == " ":
+        try:
+            return _to_seconds(datetime.fromisoformat(value))
+        except ValueError:
+            pass
+    return value
+
+def _unpack_time(value) -> Optional[str]:
+    if isinstance(value, int):
+        return (_EPOCH + timedelta(seconds=value)).strftime(TIME_FORMAT)
+    return value
+
+def _pack_factors(factors: Optional[Dict[str, float]]):
+    """标准七因子打包为 bytes；键集合不同的因子字典原样保留"""
+    if not factors:
+        return None
+    if set(factors) == set(FACTOR_NAMES):
+        try:
+            return _FACTORS_STRUCT.pack(*(float(factors[k]) for k in FACTOR_NAMES))
+        except (TypeError, ValueError):
+            pass
+    return dict(factors)
+
+def _unpack_factors(value) -> Optional[Dict[str, float]]:
+    if isinstance(value, bytes):
+        return dict(zip(FACTOR_NAMES, _FACTORS_STRUCT.unpack(value)))
+    return value
+
+class NewsRecord:
+    """存储中的单条新闻"""
+    __slots__ = (
+        "id", "title", "content", "author", "source", "url", "category", "tags", "language",
+        "significance_score", "factors", "publish_ts", "created_ts", "updated_ts",
+    )
+
+    def __init__(self, data: dict):
+        self.id = data["id"]
+        self.title = data.get("title")
+        self.content = data.get("content")
+        self.author = _intern(data.get("author"))
+        self.source = _intern(data.get("source"))
+        self.url = data.get("url")
+        self.category = _intern(data.get("category"))
+        self.tags = tuple(sys.intern(t) for t in data.get("tags") or ())
+        self.language = _intern(data.get("language"))
+        self.significance_score = data.get("significance_score")
+        self.factors = _pack_factors(data.get("significance_factors"))
+        self.publish_ts = _pack_time(data.get("publish_time"))
+        self.created_ts = _pack_time(data.get("created_at"))
+        self.updated_ts = _pack_time(data.get("updated_at"))
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "title": self.title,
+            "content": self.content,
+            "publish_time": _unpack_time(self.publish_ts),
+            "author": self.author,
+            "source": self.source,
+            "url": self.url,
+            "category": self.category,
+            "tags": list(self.tags),
+            "language": self.language,
+            "significance_score": self.significance_score,
+            "significance_factors": _unpack_factors(self.factors),
+            "created_at": _unpack_time(self.created_ts),
+            "updated_at": _unpack_time(self.updated_ts),
+        }
+
+    @classmethod
+    def from_row(cls, row) -> "NewsRecord":
+        """按 __slots__ 顺序的已打包字段值直接构造（快照恢复用，跳过 __init__ 中的打包）"""
+        record = cls.__new__(cls)
+        (record.id, record.title, record.content, record.author, record.source, record.url,
+         record.category, record.tags, record.language, record.significance_score, record.factors,
+         record.publish_ts, record.created_ts, record.updated_ts) = row
+        return record
+
+    def publish_sort_key(self) -> int:
+        """按发布时间排序用；无法解析或缺失的排在最后"""
+        return self.publish_ts if isinstance(self.publish_ts, int) else -1
+
 # 简单的内存存储（生产环境应该使用数据库）
-news_storage = {}
+# id -> NewsRecord
+news_storage: Dict[str, NewsRecord] = {}
+# URL -> 新闻 id 索引，用于导入去重；与 news_storage 一同维护
+url_index: Dict[str, str] = {}
+# 写操作可能来自线程池（同步路由）与事件循环（后台任务），统一加锁
+store_lock = threading.RLock()
+
+# ===== 变更日志 =====
+# 每次写操作版本号加一，并将变更写入有界环形缓冲区，供 /news/changes 推送
+CHANGE_LOG_SIZE = int(os.getenv("NEWS_CHANGE_LOG_SIZE", "1000"))
+store_version = 0
+change_log: deque = deque(maxlen=CHANGE_LOG_SIZE)
+_change_loop: Optional[asyncio.AbstractEventLoop] = None
+_change_event: Optional[asyncio.Event] = None
+# 预写日志文件句柄；启动恢复完成后才打开，导入模块时的样例数据不写日志
+_wal_file = None
+
+def _wake_subscribers():
+    global _change_event
+    # 广播：唤醒所有等待者后换上新的 Event
+    event, _change_event = _change_event, asyncio.Event()
+    event.set()
+
+def _record_change(op: str, news_id: str, record: Optional[dict]) -> None:
+    """记录一次变更（调用方需持有 store_lock）"""
+    global store_version
+    store_version += 1
+    change_log.append({
+        "version": store_version,
+        "op": op,
+        "id": news_id,
+        "item": dict(record) if record is not None else None,
+    })
+    if _wal_file is not None:
+        _wal_append(op, news_id, store_version)
+    if _change_loop is not None and not _change_loop.is_closed():
+        _change_loop.call_soon_threadsafe(_wake_subscribers)
+
+def _put_news(record: dict) -> None:
+    """写入一条新闻并维护索引"""
+    with store_lock:
+        op = "update" if record["id"] in news_storage else "insert"
+        news_storage[record["id"]] = NewsRecord(record)
+        if record.get("url"):
+            url_index[record["url"]] = record["id"]
+        _record_change(op, record["id"], record)
+
+def _update_news(news_id: str, changes: dict) -> dict:
+    """更新已有新闻的部分字段并维护索引，返回更新后的记录（dict）"""
+    with store_lock:
+        record = news_storage[news_id].to_dict()
+        old_url = record.get("url")
+        record.update(changes)
+        news_storage[news_id] = NewsRecord(record)
+        if old_url != record.get("url"):
+            if url_index.get(old_url) == news_id:
+                del url_index[old_url]
+            if record.get("url"):
+                url_index[record["url"]] = news_id
+        _record_change("update", news_id, record)
+        return record
+
+def _remove_news(news_id: str) -> Optional[NewsRecord]:
+    """删除一条新闻并清理索引，返回被删除的记录"""
+    with store_lock:
+        record = news_storage.pop(news_id, None)
+        if record is not None:
+            if url_index.get(record.url) == news_id:
+                del url_index[record.url]
+            _record_change("delete", news_id, None)
+        return record
 
 # 初始化一些测试数据
 sample_news = [
@@ -89,7 +309,7 @@ sample_news = [
 
 # 添加测试数据
 for news in sample_news:
-    news_storage[news["id"]] = news
+    _put_news(news)
 
 @app.get("/")
 def read_root():
@@ -280,9 +500,30 @@ def create_news(news: NewsCreate):
         updated_at=now
     )
     
-    news_storage[news_id] = news_item.dict()
+    _put_news(news_item.dict())
     return news_item
 
+@app.post("/news/bulk")
+def create_news_bulk(items: List[NewsCreate]):
+    """批量创建新闻（供网关批量处理一次性入库）；URL 已存在的条目跳过"""
+    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    created = []
+    skipped = 0
+    with store_lock:
+        for news in items:
+            if news.url in url_index:
+                skipped += 1
+                continue
+            news_item = NewsItem(
+                id=str(uuid.uuid4()),
+                **news.dict(),
+                created_at=now,
+                updated_at=now
+            )
+            _put_news(news_item.dict())
+            created.append(news_item)
+    return {"created": created, "created_count": len(created), "skipped": skipped}
+
 @app.get("/import/newsminimalist")
 async def import_newsminimalist(limit: int = Query(20, ge=1, le=100)):
     """抓取 https://www.newsminimalist.com 并将新闻转译为中文后导入存储。
@@ -294,10 +535,9 @@ async def import_newsminimalist(limit: int = Query(20, ge=1, le=100)):
         raise HTTPException(status_code=502, detail=f"Fetch error: {str(e)}")
 
     # 去重：按 URL 作为唯一键
-    existing_urls = {n.get("url") for n in news_storage.values()}
     imported = []
     for n in items:
-        if n["url"] in existing_urls:
+        if n["url"] in url_index:
             continue
         news_id = str(uuid.uuid4())
         now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
@@ -307,7 +547,7 @@ async def import_newsminimalist(limit: int = Query(20, ge=1, le=100)):
             "created_at": now,
             "updated_at": now
         }
-        news_storage[news_id] = record
+        _put_news(record)
         imported.append(record)
 
     return {
@@ -333,10 +573,9 @@ async def import_google_news(
     except httpx.HTTPError as e:
         raise HTTPException(status_code=502, detail=f"Fetch error: {str(e)}")
 
-    existing_urls = {n.get("url") for n in news_storage.values()}
     imported = []
     for n in items:
-        if n["url"] in existing_urls:
+        if n["url"] in url_index:
             continue
         news_id = str(uuid.uuid4())
         now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
@@ -350,7 +589,7 @@ async def import_google_news(
                 record["updated_at"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
             except Exception:
                 pass
-        news_storage[news_id] = record
+        _put_news(record)
         imported.append(record)
     return {
         "imported_count": len(imported),
@@ -493,15 +732,16 @@ async def score_single_news(news_id: str):
         raise HTTPException(status_code=404, detail="News not found")
     n = news_storage[news_id]
     try:
-        res = await deepseek_score_news(n.get("title", ""), n.get("content"), n.get("language"))
+        res = await deepseek_score_news(n.title or "", n.content, n.language)
     except httpx.HTTPError as e:
         raise HTTPException(status_code=502, detail=f"DeepSeek call error: {str(e)}")
     except HTTPException:
         raise
-    n["significance_score"] = res.get("score")
-    n["significance_factors"] = {k: v for k, v in res.items() if k != "score"}
-    n["updated_at"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    news_storage[news_id] = n
+    n = _update_news(news_id, {
+        "significance_score": res.get("score"),
+        "significance_factors": {k: v for k, v in res.items() if k != "score"},
+        "updated_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+    })
     return {"id": news_id, "score": n["significance_score"], "factors": n["significance_factors"]}
 
 @app.post("/rescore")
@@ -516,12 +756,82 @@ async def rescore_all(limit: int = Query(20, ge=1, le=200)):
             continue
     return {"rescored": len(updated), "items": updated}
 
+# ===== 条件请求（ETag） =====
+# 弱 ETag 由 common/etag.py 生成（启动标识 + 存储版本号 + 查询摘要）；任何写操作都会使其失效
+
+def _conditional(request: Request, response: Response) -> Optional[Response]:
+    """设置 ETag；若客户端缓存仍有效则返回 304 响应，否则返回 None"""
+    return etag.conditional(request, response, store_version)
+
 @app.get("/top")
-def list_top(min_score: float = Query(5.0, ge=0.0, le=10.0), limit: int = Query(10, ge=1, le=100)):
-    items = [n for n in news_storage.values() if n.get("significance_score", 0.0) >= min_score]
-    items.sort(key=lambda x: x.get("significance_score", 0.0), reverse=True)
+def list_top(request: Request, response: Response, min_score: float = Query(5.0, ge=0.0, le=10.0), limit: int = Query(10, ge=1, le=100)):
+    not_modified = _conditional(request, response)
+    if not_modified:
+        return not_modified
+    items = [n for n in news_storage.values() if (n.significance_score or 0.0) >= min_score]
+    items.sort(key=lambda x: x.significance_score or 0.0, reverse=True)
     items = items[:limit]
-    return [NewsItem(**n) for n in items]
+    return [NewsItem(**n.to_dict()) for n in items]
+
+# ===== 变更订阅（SSE） =====
+CHANGE_HEARTBEAT_SECONDS = float(os.getenv("NEWS_CHANGE_HEARTBEAT_SECONDS", "15"))
+
+def _changes_since(version: int):
+    """返回 (变更列表, 是否需要重新同步)"""
+    with store_lock:
+        if version > store_version:
+            return [], True
+        if version == store_version:
+            return [], False
+        # 缓冲区已不包含 version 之后的第一条变更，客户端落后太多
+        if not change_log or change_log[0]["version"] > version + 1:
+            return [], True
+        return [c for c in change_log if c["version"] > version], False
+
+def _sse(event: str, data: dict, event_id: Optional[int] = None) -> str:
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, ensure_ascii=False)}")
+    return "\n".join(lines) + "\n\n"
+
+@app.get("/news/changes")
+async def news_changes(request: Request, since: Optional[int] = Query(None, ge=0)):
+    """以 SSE 推送 since 版本之后的新增（insert）、更新（update）、删除（delete）。
+    客户端落后超出缓冲区时发送 resync 事件并结束，客户端应重新拉取 /news 后以新版本号重连。
+    """
+    if since is None:
+        last_event_id = request.headers.get("last-event-id")
+        since = int(last_event_id) if last_event_id and last_event_id.isdigit() else store_version
+
+    async def stream():
+        cursor = since
+        while True:
+            # 先取当前 Event 再读日志，避免读取与等待之间的变更丢失唤醒
+            waiter = _change_event
+            changes, resync = _changes_since(cursor)
+            if resync:
+                yield _sse("resync", {"version": store_version})
+                return
+            for change in changes:
+                yield _sse(change["op"], change, event_id=change["version"])
+                cursor = change["version"]
+            if await request.is_disconnected():
+                return
+            try:
+                if waiter is None:
+                    await asyncio.sleep(1.0)
+                else:
+                    await asyncio.wait_for(waiter.wait(), timeout=CHANGE_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 @app.get("/news/{news_id}", response_model=NewsItem)
 def get_news(news_id: str):
@@ -529,10 +839,12 @@ def get_news(news_id: str):
     if news_id not in news_storage:
         raise HTTPException(status_code=404, detail="News not found")
     
-    return NewsItem(**news_storage[news_id])
+    return NewsItem(**news_storage[news_id].to_dict())
 
 @app.get("/news", response_model=List[NewsItem])
 def list_news(
+    request: Request,
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1, le=100),
     category: Optional[str] = None,
@@ -540,31 +852,34 @@ def list_news(
     keyword: Optional[str] = None
 ):
     """获取新闻列表，支持分页和筛选"""
+    not_modified = _conditional(request, response)
+    if not_modified:
+        return not_modified
     news_list = list(news_storage.values())
     
     # 应用筛选条件
     if category:
-        news_list = [n for n in news_list if n.get("category") == category]
+        news_list = [n for n in news_list if n.category == category]
     
     if source:
-        news_list = [n for n in news_list if n.get("source") == source]
+        news_list = [n for n in news_list if n.source == source]
     
     if keyword:
         keyword = keyword.lower()
         news_list = [
             n for n in news_list 
-            if (keyword in n.get("title", "").lower() or 
-                keyword in n.get("content", "").lower())
+            if (keyword in (n.title or "").lower() or 
+                keyword in (n.content or "").lower())
         ]
     
     # 按发布时间排序（最新的在前）
-    news_list.sort(key=lambda x: x.get("publish_time", ""), reverse=True)
+    news_list.sort(key=NewsRecord.publish_sort_key, reverse=True)
     
     # 分页
     total = len(news_list)
     news_list = news_list[skip:skip + limit]
     
-    return [NewsItem(**news) for news in news_list]
+    return [NewsItem(**news.to_dict()) for news in news_list]
 
 @app.put("/news/{news_id}", response_model=NewsItem)
 def update_news(news_id: str, news_update: NewsUpdate):
@@ -572,15 +887,13 @@ def update_news(news_id: str, news_update: NewsUpdate):
     if news_id not in news_storage:
         raise HTTPException(status_code=404, detail="News not found")
     
-    existing_news = news_storage[news_id]
     update_data = news_update.dict(exclude_unset=True)
     
     # 更新时间戳
     update_data["updated_at"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     
     # 更新新闻数据
-    existing_news.update(update_data)
-    news_storage[news_id] = existing_news
+    existing_news = _update_news(news_id, update_data)
     
     return NewsItem(**existing_news)
 
@@ -590,12 +903,15 @@ def delete_news(news_id: str):
     if news_id not in news_storage:
         raise HTTPException(status_code=404, detail="News not found")
     
-    del news_storage[news_id]
+    _remove_news(news_id)
     return {"message": "News deleted successfully"}
 
 @app.get("/stats")
-def get_stats():
+def get_stats(request: Request, response: Response):
     """获取统计信息"""
+    not_modified = _conditional(request, response)
+    if not_modified:
+        return not_modified
     news_list = list(news_storage.values())
     
     stats = {
@@ -607,22 +923,559 @@ def get_stats():
     
     # 统计分类
     for news in news_list:
-        category = news.get("category", "未分类")
+        category = news.category or "未分类"
         stats["categories"][category] = stats["categories"].get(category, 0) + 1
         
-        source = news.get("source", "未知")
+        source = news.source or "未知"
         stats["sources"][source] = stats["sources"].get(source, 0) + 1
     
     # 获取最新新闻
     if news_list:
-        latest = max(news_list, key=lambda x: x.get("publish_time", ""))
+        latest = max(news_list, key=NewsRecord.publish_sort_key)
         stats["latest_news"] = {
-            "title": latest.get("title"),
-            "publish_time": latest.get("publish_time")
+            "title": latest.title,
+            "publish_time": _unpack_time(latest.publish_ts)
         }
     
     return stats
 
+# ===== 保留策略与后台压缩 =====
+# 最大保留时长（小时，按 publish_time，缺失或无法解析时按 created_at）；0 表示不按时间淘汰
+RETENTION_MAX_AGE_HOURS = float(os.getenv("NEWS_RETENTION_MAX_AGE_HOURS", "0"))
+# 最大保留条数；超出时优先淘汰最旧的低分新闻；0 表示不限
+RETENTION_MAX_ITEMS = int(os.getenv("NEWS_RETENTION_MAX_ITEMS", "5000"))
+# 高分保留：显著性分数不低于该阈值的新闻保留时长乘以 KEEP_FACTOR，且超额时最后淘汰；0 表示关闭
+RETENTION_KEEP_SCORE = float(os.getenv("NEWS_RETENTION_KEEP_SCORE", "0"))
+RETENTION_KEEP_FACTOR = float(os.getenv("NEWS_RETENTION_KEEP_FACTOR", "3"))
+# 后台压缩间隔（秒）
+RETENTION_INTERVAL_SECONDS = float(os.getenv("NEWS_RETENTION_INTERVAL_SECONDS", "300"))
+
+last_compaction: Optional[dict] = None
+
+def _record_timestamp(record: NewsRecord) -> float:
+    """返回用于保留策略的时间戳：优先 publish_time，其次 created_at"""
+    for value in (record.publish_ts, record.created_ts):
+        if isinstance(value, int):
+            return float(value)
+    return 0.0
+
+def _is_high_score(record: NewsRecord) -> bool:
+    return RETENTION_KEEP_SCORE > 0 and (record.significance_score or 0.0) >= RETENTION_KEEP_SCORE
+
+def _estimate_size(obj) -> int:
+    """粗略估算对象占用的字节数（递归统计容器、slots 记录与其中的字符串、数字）。
+    驻留的共享字符串也会计入，因此结果是上限估计。
+    """
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(_estimate_size(k) + _estimate_size(v) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set)):
+        size += sum(_estimate_size(v) for v in obj)
+    elif isinstance(obj, NewsRecord):
+        size += sum(_estimate_size(getattr(obj, k)) for k in NewsRecord.__slots__)
+    return size
+
+def compact_store(now: Optional[float] = None) -> dict:
+    """按保留策略淘汰新闻并清理索引，返回淘汰条数与回收字节数"""
+    global last_compaction
+    started = time.perf_counter()
+    now = now or _to_seconds(datetime.now())
+    with store_lock:
+        entries = [(nid, rec, _record_timestamp(rec)) for nid, rec in news_storage.items()]
+
+        # 1. 按时间淘汰
+        expired = set()
+        if RETENTION_MAX_AGE_HOURS > 0:
+            max_age = RETENTION_MAX_AGE_HOURS * 3600
+            for nid, rec, ts in entries:
+                limit = max_age * RETENTION_KEEP_FACTOR if _is_high_score(rec) else max_age
+                if now - ts > limit:
+                    expired.add(nid)
+
+        # 2. 按条数淘汰：低分优先、时间最旧优先
+        over_limit = set()
+        remaining = [e for e in entries if e[0] not in expired]
+        if RETENTION_MAX_ITEMS > 0 and len(remaining) > RETENTION_MAX_ITEMS:
+            remaining.sort(key=lambda e: (_is_high_score(e[1]), e[2]))
+            over_limit = {nid for nid, _, _ in remaining[:len(remaining) - RETENTION_MAX_ITEMS]}
+
+        bytes_reclaimed = 0
+        for nid in expired | over_limit:
+            record = _remove_news(nid)
+            if record is not None:
+                bytes_reclaimed += _estimate_size(record)
+
+        report = {
+            "evicted": len(expired) + len(over_limit),
+            "evicted_expired": len(expired),
+            "evicted_over_limit": len(over_limit),
+            "bytes_reclaimed": bytes_reclaimed,
+            "remaining": len(news_storage),
+            "duration_ms": round((time.perf_counter() - started) * 1000, 3),
+            "ran_at": datetime.now().isoformat(),
+        }
+    last_compaction = report
+    return report
+
+async def _retention_loop():
+    while True:
+        await asyncio.sleep(RETENTION_INTERVAL_SECONDS)
+        try:
+            # 在线程中执行：压缩期间持有 store_lock 重建索引，不能阻塞事件循环
+            report = await asyncio.to_thread(compact_store)
+            if report["evicted"]:
+                logger.info("保留策略压缩：淘汰 %d 条，回收约 %d 字节", report["evicted"], report["bytes_reclaimed"])
+        except Exception:
+            logger.exception("保留策略压缩出错")
+
+@app.post("/compact")
+def run_compaction():
+    """立即按保留策略执行一次压缩"""
+    return compact_store()
+
+@app.get("/retention")
+def get_retention():
+    """查看保留策略配置与最近一次压缩结果"""
+    return {
+        "policy": {
+            "max_age_hours": RETENTION_MAX_AGE_HOURS,
+            "max_items": RETENTION_MAX_ITEMS,
+            "keep_score": RETENTION_KEEP_SCORE,
+            "keep_factor": RETENTION_KEEP_FACTOR,
+            "interval_seconds": RETENTION_INTERVAL_SECONDS,
+        },
+        "last_compaction": last_compaction,
+    }
+
+# ===== 快照与预写日志 =====
+# 快照：定期将全部记录原子地写入本地二进制列式文件，启动时经 mmap 按列整块解码。
+# 预写日志（WAL）：两次快照之间的每次写操作追加一条长度前缀的记录，启动时重放版本号大于快照的条目。
+# URL 索引由记录重建，不单独落盘。NEWS_SNAPSHOT_PATH 置空即关闭。
+SNAPSHOT_PATH = os.getenv("NEWS_SNAPSHOT_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "news.snapshot"))
+SNAPSHOT_INTERVAL_SECONDS = float(os.getenv("NEWS_SNAPSHOT_INTERVAL_SECONDS", "60"))
+WAL_FSYNC = os.getenv("NEWS_WAL_FSYNC", "0") == "1"
+WAL_PATH = SNAPSHOT_PATH + ".wal"
+# 快照进行中时轮转出来的旧日志，快照落盘后删除
+WAL_PREV_PATH = SNAPSHOT_PATH + ".wal.prev"
+
+_SNAPSHOT_MAGIC = b"NEWSCOL1"
+_SNAPSHOT_HEADER = struct.Struct("<8sQQH")  # magic, store_version, 记录数, 列数
+_COLUMN_HEADER = struct.Struct("<HBQ")      # 列名长度, 列类型, 列数据长度
+_WAL_ENTRY = struct.Struct("<IBQ")          # 负载长度, 操作, 版本号
+_U32 = struct.Struct("<I")
+_U16 = struct.Struct("<H")
+_I64 = struct.Struct("<q")
+_F64 = struct.Struct("<d")
+_WAL_PUT, _WAL_DELETE = 1, 2
+
+last_snapshot: Optional[dict] = None
+last_restore: Optional[dict] = None
+# 串行化快照写入（各调用方共用同一个临时文件）
+_snapshot_write_lock = threading.Lock()
+
+# --- 列编码 ---
+# 每列整块存放：字符串列 = 空值标记 + 字符偏移数组 + 一整段 UTF-8（解码一次后按偏移切片），
+# 分类型列字典编码（去重值表 + 编号数组，恢复后同值共享同一个对象），数值列为定长数组。
+_COL_STR, _COL_DICT, _COL_FLOAT, _COL_TIME, _COL_FACTORS, _COL_TAGS = range(6)
+_COLUMN_KINDS = {
+    "id": _COL_STR, "title": _COL_STR, "content": _COL_STR, "url": _COL_STR,
+    "author": _COL_DICT, "source": _COL_DICT, "category": _COL_DICT, "language": _COL_DICT,
+    "tags": _COL_TAGS, "significance_score": _COL_FLOAT, "factors": _COL_FACTORS,
+    "publish_ts": _COL_TIME, "created_ts": _COL_TIME, "updated_ts": _COL_TIME,
+}
+
+def _array_bytes(typecode: str, values) -> bytes:
+    data = array(typecode, values).tobytes()
+    return _U32.pack(len(data)) + data
+
+def _read_array(typecode: str, buf, offset: int):
+    (length,) = _U32.unpack_from(buf, offset)
+    offset += 4
+    values = array(typecode)
+    values.frombytes(buf[offset:offset + length])
+    return values, offset + length
+
+def _encode_strs(values) -> bytes:
+    nulls = bytes(1 if v is None else 0 for v in values)
+    ends, total, parts = [0], 0, []
+    for v in values:
+        if v:
+            parts.append(v)
+            total += len(v)
+        ends.append(total)
+    data = "".join(parts).encode("utf-8")
+    return _U32.pack(len(values)) + nulls + _array_bytes("I", ends) + _U32.pack(len(data)) + data
+
+def _decode_strs(buf, offset: int):
+    (count,) = _U32.unpack_from(buf, offset)
+    offset += 4
+    nulls = buf[offset:offset + count]
+    offset += count
+    ends, offset = _read_array("I", buf, offset)
+    (length,) = _U32.unpack_from(buf, offset)
+    offset += 4
+    if nulls.count(0) == 0:
+        # 整列为空（如时间列的原始字符串）时跳过逐条切片
+        return [None] * count, offset + length
+    text = str(buf[offset:offset + length], "utf-8")
+    values = [None if null else text[a:b] for null, a, b in zip(nulls, ends, ends[1:])]
+    return values, offset + length
+
+def _encode_dict(values) -> bytes:
+    table, codes = {}, []
+    for v in values:
+        codes.append(0 if v is None else table.setdefault(v, len(table) + 1))
+    return _encode_strs(list(table)) + _array_bytes("I", codes)
+
+def _decode_dict(buf, offset: int):
+    table, offset = _decode_strs(buf, offset)
+    lookup = [None] + [sys.intern(v) for v in table]
+    codes, offset = _read_array("I", buf, offset)
+    return [lookup[c] for c in codes], offset
+
+def _encode_column(kind: int, values) -> bytes:
+    if kind == _COL_STR:
+        return _encode_strs(values)
+    if kind == _COL_DICT:
+        return _encode_dict(values)
+    if kind == _COL_FLOAT:
+        flags = bytes(0 if v is None else 1 for v in values)
+        return flags + _array_bytes("d", [0.0 if v is None else float(v) for v in values])
+    if kind == _COL_TIME:
+        # 整数秒放数组；无法解析的原始字符串单独成列
+        flags = bytes(0 if v is None else 1 if isinstance(v, int) else 2 for v in values)
+        ints = [v if isinstance(v, int) else 0 for v in values]
+        raws = [v if isinstance(v, str) else None for v in values]
+        return flags + _array_bytes("q", ints) + _encode_strs(raws)
+    if kind == _COL_FACTORS:
+        flags = bytes(0 if v is None else 1 if isinstance(v, bytes) else 2 for v in values)
+        packed = b"".join(v if isinstance(v, bytes) else bytes(_FACTORS_STRUCT.size) for v in values)
+        extra = [json.dumps(v, ensure_ascii=False) if isinstance(v, dict) else None for v in values]
+        return flags + _U32.pack(len(packed)) + packed + _encode_strs(extra)
+    if kind == _COL_TAGS:
+        counts = [len(v) for v in values]
+        flat = [tag for v in values for tag in v]
+        return _array_bytes("H", counts) + _encode_dict(flat)
+    raise ValueError(f"Unknown column kind: {kind}")
+
+def _decode_column(kind: int, buf, offset: int, count: int):
+    if kind == _COL_STR:
+        return _decode_strs(buf, offset)
+    if kind == _COL_DICT:
+        return _decode_dict(buf, offset)
+    flags = buf[offset:offset + count] if kind in (_COL_FLOAT, _COL_TIME, _COL_FACTORS) else b""
+    offset += len(flags)
+    if kind == _COL_FLOAT:
+        numbers, offset = _read_array("d", buf, offset)
+        return [n if f else None for f, n in zip(flags, numbers)], offset
+    if kind == _COL_TIME:
+        ints, offset = _read_array("q", buf, offset)
+        raws, offset = _decode_strs(buf, offset)
+        return [None if f == 0 else i if f == 1 else r for f, i, r in zip(flags, ints, raws)], offset
+    if kind == _COL_FACTORS:
+        (length,) = _U32.unpack_from(buf, offset)
+        offset += 4
+        packed = bytes(buf[offset:offset + length])
+        offset += length
+        extra, offset = _decode_strs(buf, offset)
+        size = _FACTORS_STRUCT.size
+        values = []
+        for i, f in enumerate(flags):
+            if f == 1:
+                values.append(packed[i * size:(i + 1) * size])
+            elif f == 2:
+                values.append(json.loads(extra[i]))
+            else:
+                values.append(None)
+        return values, offset
+    if kind == _COL_TAGS:
+        counts, offset = _read_array("H", buf, offset)
+        flat, offset = _decode_dict(buf, offset)
+        values, pos = [], 0
+        for n in counts:
+            values.append(tuple(flat[pos:pos + n]))
+            pos += n
+        return values, offset
+    raise ValueError(f"Unknown column kind: {kind}")
+
+# --- 单条记录编码（预写日志用） ---
+_T_NONE, _T_STR, _T_INT, _T_FLOAT, _T_BYTES, _T_TAGS, _T_JSON = range(7)
+_INTERNED_FIELDS = {"author", "source", "category", "language"}
+
+def _encode_value(value, out: bytearray) -> None:
+    if value is None:
+        out.append(_T_NONE)
+    elif isinstance(value, str):
+        data = value.encode("utf-8")
+        out.append(_T_STR)
+        out += _U32.pack(len(data))
+        out += data
+    elif isinstance(value, int) and not isinstance(value, bool):
+        out.append(_T_INT)
+        out += _I64.pack(value)
+    elif isinstance(value, float):
+        out.append(_T_FLOAT)
+        out += _F64.pack(value)
+    elif isinstance(value, bytes):
+        out.append(_T_BYTES)
+        out += _U32.pack(len(value))
+        out += value
+    elif isinstance(value, tuple):
+        out.append(_T_TAGS)
+        out += _U16.pack(len(value))
+        for tag in value:
+            data = tag.encode("utf-8")
+            out += _U32.pack(len(data))
+            out += data
+    else:
+        out.append(_T_JSON)
+        data = json.dumps(value, ensure_ascii=False).encode("utf-8")
+        out += _U32.pack(len(data))
+        out += data
+
+def _decode_value(buf, offset: int):
+    """从 buf[offset] 解码一个字段值，返回 (值, 新偏移)"""
+    tag = buf[offset]
+    offset += 1
+    if tag == _T_NONE:
+        return None, offset
+    if tag == _T_INT:
+        return _I64.unpack_from(buf, offset)[0], offset + 8
+    if tag == _T_FLOAT:
+        return _F64.unpack_from(buf, offset)[0], offset + 8
+    if tag == _T_TAGS:
+        (count,) = _U16.unpack_from(buf, offset)
+        offset += 2
+        tags = []
+        for _ in range(count):
+            (length,) = _U32.unpack_from(buf, offset)
+            offset += 4
+            tags.append(sys.intern(str(buf[offset:offset + length], "utf-8")))
+            offset += length
+        return tuple(tags), offset
+    (length,) = _U32.unpack_from(buf, offset)
+    offset += 4
+    data = buf[offset:offset + length]
+    offset += length
+    if tag == _T_STR:
+        return str(data, "utf-8"), offset
+    if tag == _T_BYTES:
+        return bytes(data), offset
+    return json.loads(data), offset
+
+def _encode_record(record: NewsRecord) -> bytes:
+    out = bytearray()
+    for field in NewsRecord.__slots__:
+        _encode_value(getattr(record, field), out)
+    return bytes(out)
+
+def _decode_record(buf, offset: int) -> NewsRecord:
+    row = []
+    for field in NewsRecord.__slots__:
+        value, offset = _decode_value(buf, offset)
+        if field in _INTERNED_FIELDS and value:
+            value = sys.intern(value)
+        row.append(value)
+    return NewsRecord.from_row(row)
+
+def write_snapshot() -> dict:
+    """原子地写入快照：先写临时文件并 fsync，再 os.replace 覆盖。
+    POST /snapshot、后台快照与退出前快照可能同时调用，共用同一个临时文件，需串行执行。
+    """
+    with _snapshot_write_lock:
+        return _write_snapshot()
+
+def _write_snapshot() -> dict:
+    global last_snapshot
+    started = time.perf_counter()
+    # 记录写入后不再原地修改（更新会替换为新对象），持锁期间只需复制引用并轮转日志
+    with store_lock:
+        records = list(news_storage.values())
+        version = store_version
+        _rotate_wal()
+    os.makedirs(os.path.dirname(SNAPSHOT_PATH) or ".", exist_ok=True)
+    tmp_path = SNAPSHOT_PATH + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_SNAPSHOT_HEADER.pack(_SNAPSHOT_MAGIC, version, len(records), len(_COLUMN_KINDS)))
+        for field, kind in _COLUMN_KINDS.items():
+            name = field.encode("utf-8")
+            blob = _encode_column(kind, [getattr(r, field) for r in records])
+            f.write(_COLUMN_HEADER.pack(len(name), kind, len(blob)))
+            f.write(name)
+            f.write(blob)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, SNAPSHOT_PATH)
+    # 快照已包含轮转前日志中的全部写入
+    if os.path.exists(WAL_PREV_PATH):
+        os.remove(WAL_PREV_PATH)
+    last_snapshot = {
+        "records": len(records),
+        "version": version,
+        "bytes": os.path.getsize(SNAPSHOT_PATH),
+        "duration_ms": round((time.perf_counter() - started) * 1000, 3),
+        "written_at": datetime.now().isoformat(),
+    }
+    return last_snapshot
+
+def _load_snapshot() -> int:
+    """经 mmap 按列读入快照，返回快照对应的存储版本号；无快照时返回 -1"""
+    if not os.path.exists(SNAPSHOT_PATH) or os.path.getsize(SNAPSHOT_PATH) < _SNAPSHOT_HEADER.size:
+        return -1
+    with open(SNAPSHOT_PATH, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+        magic, version, count, ncols = _SNAPSHOT_HEADER.unpack_from(buf, 0)
+        if magic != _SNAPSHOT_MAGIC:
+            raise ValueError(f"Unknown snapshot format: {magic!r}")
+        offset = _SNAPSHOT_HEADER.size
+        columns = {}
+        for _ in range(ncols):
+            name_len, kind, blob_len = _COLUMN_HEADER.unpack_from(buf, offset)
+            offset += _COLUMN_HEADER.size
+            name = str(buf[offset:offset + name_len], "utf-8")
+            offset += name_len
+            # 未知列（旧版本字段）直接跳过
+            if name in _COLUMN_KINDS:
+                columns[name], _ = _decode_column(kind, buf, offset, count)
+            offset += blob_len
+    # 快照中缺少的列（新增字段）以默认值补齐
+    for field in NewsRecord.__slots__:
+        if field not in columns:
+            columns[field] = [() if field == "tags" else None] * count
+    for row in zip(*(columns[field] for field in NewsRecord.__slots__)):
+        record = NewsRecord.from_row(row)
+        news_storage[record.id] = record
+        if record.url:
+            url_index[record.url] = record.id
+    return version
+
+def _replay_wal(path: str, after_version: int) -> int:
+    """重放日志中版本号大于 after_version 的条目，返回重放条数；末尾的残缺条目忽略"""
+    global store_version
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return 0
+    replayed = 0
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+        offset, size = 0, len(buf)
+        while offset + _WAL_ENTRY.size <= size:
+            length, op, version = _WAL_ENTRY.unpack_from(buf, offset)
+            offset += _WAL_ENTRY.size
+            if offset + length > size:
+                break
+            if version > after_version:
+                if op == _WAL_PUT:
+                    record = _decode_record(buf, offset)
+                    old = news_storage.get(record.id)
+                    if old is not None and old.url != record.url and url_index.get(old.url) == record.id:
+                        del url_index[old.url]
+                    news_storage[record.id] = record
+                    if record.url:
+                        url_index[record.url] = record.id
+                elif op == _WAL_DELETE:
+                    news_id = str(buf[offset:offset + length], "utf-8")
+                    old = news_storage.pop(news_id, None)
+                    if old is not None and url_index.get(old.url) == news_id:
+                        del url_index[old.url]
+                store_version = max(store_version, version)
+                replayed += 1
+            offset += length
+    return replayed
+
+def restore_store() -> dict:
+    """启动时从快照与日志恢复存储；两者都不存在时保留内置样例数据"""
+    global store_version, last_restore
+    started = time.perf_counter()
+    has_data = any(os.path.exists(p) for p in (SNAPSHOT_PATH, WAL_PATH, WAL_PREV_PATH))
+    records = replayed = 0
+    if has_data:
+        with store_lock:
+            news_storage.clear()
+            url_index.clear()
+            change_log.clear()
+            store_version = 0
+            version = _load_snapshot()
+            records = len(news_storage)
+            store_version = max(version, 0)
+            # 先重放上次快照未完成时轮转出的旧日志，再重放当前日志
+            for path in (WAL_PREV_PATH, WAL_PATH):
+                replayed += _replay_wal(path, version)
+    last_restore = {
+        "snapshot_records": records,
+        "wal_entries": replayed,
+        "total": len(news_storage),
+        "version": store_version,
+        "seeded": not has_data,
+        "duration_ms": round((time.perf_counter() - started) * 1000, 3),
+    }
+    return last_restore
+
+def _open_wal():
+    global _wal_file
+    os.makedirs(os.path.dirname(WAL_PATH) or ".", exist_ok=True)
+    _wal_file = open(WAL_PATH, "ab")
+
+def _close_wal():
+    global _wal_file
+    if _wal_file is not None:
+        _wal_file.close()
+        _wal_file = None
+
+def _rotate_wal():
+    """快照开始时轮转日志（调用方需持有 store_lock）。
+    若上次快照失败留下了旧日志，则把当前日志追加到旧日志后面，避免丢失。
+    """
+    if _wal_file is None:
+        return
+    _close_wal()
+    if os.path.exists(WAL_PREV_PATH):
+        with open(WAL_PATH, "rb") as src, open(WAL_PREV_PATH, "ab") as dst:
+            dst.write(src.read())
+        os.remove(WAL_PATH)
+    elif os.path.exists(WAL_PATH):
+        os.replace(WAL_PATH, WAL_PREV_PATH)
+    _open_wal()
+
+def _wal_append(op: str, news_id: str, version: int) -> None:
+    """追加一条日志（由 _record_change 在持有 store_lock 时调用）"""
+    if op == "delete":
+        code, payload = _WAL_DELETE, news_id.encode("utf-8")
+    else:
+        code, payload = _WAL_PUT, _encode_record(news_storage[news_id])
+    _wal_file.write(_WAL_ENTRY.pack(len(payload), code, version) + payload)
+    _wal_file.flush()
+    if WAL_FSYNC:
+        os.fsync(_wal_file.fileno())
+
+async def _snapshot_loop():
+    last_version = store_version
+    while True:
+        await asyncio.sleep(SNAPSHOT_INTERVAL_SECONDS)
+        if store_version == last_version:
+            continue
+        try:
+            # 编码与写盘放到线程中，避免阻塞事件循环
+            report = await asyncio.to_thread(write_snapshot)
+            last_version = report["version"]
+        except Exception:
+            logger.exception("写入快照出错")
+
+@app.post("/snapshot")
+def run_snapshot():
+    """立即写入一次快照"""
+    if not SNAPSHOT_PATH:
+        raise HTTPException(status_code=400, detail="Snapshot disabled")
+    return write_snapshot()
+
+@app.get("/snapshot")
+def get_snapshot_status():
+    """查看快照配置、最近一次快照与启动恢复结果"""
+    return {
+        "path": SNAPSHOT_PATH or None,
+        "interval_seconds": SNAPSHOT_INTERVAL_SECONDS,
+        "wal_fsync": WAL_FSYNC,
+        "last_snapshot": last_snapshot,
+        "last_restore": last_restore,
+    }
+
 @app.get("/health")
 def health_check():
     """健康检查"""
@@ -1,10 +1,53 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from bs4 import BeautifulSoup
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Iterator, List, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
+from functools import lru_cache
+import asyncio
+import io
 import json
+import logging
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+import os
+import re
+import sys
+import time
+import urllib.parse
 
-app = FastAPI()
+# 共享的指标采集模块位于 backend/common
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "common"))
+from instrumentation import instrument_app
+from compression import CompressionMiddleware
+import charset
+
+try:
+    from lxml import etree
+except ImportError:
+    etree = None
+
+try:
+    from bs4.filter import ElementFilter
+except ImportError:  # beautifulsoup4 < 4.13
+    ElementFilter = None
+
+logger = logging.getLogger("parser-service")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    _start_executor()
+    try:
+        yield
+    finally:
+        _stop_executor()
+
+app = FastAPI(lifespan=lifespan)
+instrument_app(app, "parser")
+app.add_middleware(CompressionMiddleware)
 
 class ParseRequest(BaseModel):
     content: str
@@ -19,7 +62,100 @@ class NewsData(BaseModel):
     source: str
     url: str
 
+# ===== 解析执行方式 =====
+# PARSER_EXECUTION=thread（默认）：在线程池中解析，受 GIL 限制，并发解析无法利用多核；
+# PARSER_EXECUTION=process：在 PARSER_WORKERS 个工作进程中解析，工作进程启动时预热解析器，
+# 传入原始字节、只回传字段元组。等待中的解析超过 PARSER_MAX_PENDING 时直接返回 503 与 Retry-After，调用方据此退避。
+PARSER_EXECUTION = os.getenv("PARSER_EXECUTION", "thread")
+PARSER_WORKERS = int(os.getenv("PARSER_WORKERS", str(os.cpu_count() or 1)))
+PARSER_MAX_PENDING = int(os.getenv("PARSER_MAX_PENDING", str(PARSER_WORKERS * 4)))
+
+_executor: Optional[ProcessPoolExecutor] = None
+_pending = 0
+_rejected = 0
+
+def _init_worker():
+    """工作进程初始化：预先解析一次小文档，完成解析器的导入与初始化"""
+    sample = "<html><head><title>t</title></head><body><article><time>t</time>x</article></body></html>"
+    parse_html(sample, "warmup")
+    parse_html_bs4(sample, "warmup")
+
+def _start_executor():
+    global _executor
+    if PARSER_EXECUTION == "process" and _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=PARSER_WORKERS, initializer=_init_worker)
+        # 提前拉起全部工作进程，避免首批请求承担启动开销
+        for future in [_executor.submit(os.getpid) for _ in range(PARSER_WORKERS)]:
+            future.result()
+
+def _stop_executor():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+async def _execute(func, *args):
+    """按 PARSER_EXECUTION 执行解析任务；进程模式下排队已满时返回 503"""
+    global _pending, _rejected
+    if _executor is None:
+        return await run_in_threadpool(func, *args)
+    if _pending >= PARSER_MAX_PENDING:
+        _rejected += 1
+        raise HTTPException(status_code=503, detail="Parser overloaded", headers={"Retry-After": "1"})
+    _pending += 1
+    try:
+        return await asyncio.wrap_future(_executor.submit(func, *args))
+    finally:
+        _pending -= 1
+
+def _parse_compact(content, content_type: str, source_url: str, encoding: Optional[str] = None,
+                   template: Optional[dict] = None) -> tuple:
+    """解析任务（可在工作进程中执行）：content 为 bytes 时先解码。
+    返回 ((title, content, publish_time, author), winners, 耗时毫秒)；HTML 按调用方查好的站点模板解析，
+    命中的选择器随结果回传，由服务进程记录（工作进程之间不共享模板），其他格式 winners 为 None。
+    """
+    if isinstance(content, bytes):
+        content = _decode(content, encoding)
+    winners = None
+    started = time.perf_counter()
+    if content_type == "html":
+        winners = {}
+        try:
+            news = _parse_html_backend(content, source_url, template, winners)
+        except Exception:
+            news = NewsData(source=source_url, url=source_url)
+    else:
+        news = parse_data(ParseRequest(content=content, content_type=content_type, source_url=source_url))
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    return (news.title, news.content, news.publish_time, news.author), winners, elapsed_ms
+
+async def _parse_and_learn(content, content_type: str, source_url: str, encoding: Optional[str] = None) -> tuple:
+    """在服务进程中查站点模板、执行解析任务并记录命中情况，返回字段元组"""
+    template = template_for(source_url) if content_type == "html" else None
+    fields, winners, elapsed_ms = await _execute(_parse_compact, content, content_type, source_url, encoding, template)
+    if winners is not None:
+        record_template(source_url, template, winners, elapsed_ms)
+    return fields
+
+def _feed_compact(body: bytes, source_url: str, encoding: Optional[str] = None) -> List[tuple]:
+    """订阅源解析任务：每个条目只返回 (title, content, publish_time, author, url)"""
+    _require_feed_parser()
+    try:
+        return [(e.title, e.content, e.publish_time, e.author, e.url) for e in iter_feed_entries(body, source_url, encoding)]
+    except etree.LxmlError:
+        return []
+
+def _news_from_compact(fields: tuple, source_url: str) -> NewsData:
+    title, content, publish_time, author = fields[:4]
+    url = fields[4] if len(fields) > 4 else source_url
+    return NewsData(title=title, content=content, publish_time=publish_time, author=author, source=source_url, url=url)
+
 @app.post("/parse", response_model=NewsData)
+async def parse_endpoint(request: ParseRequest):
+    """解析不同格式的新闻数据（按 PARSER_EXECUTION 在线程池或进程池中执行）"""
+    fields = await _parse_and_learn(request.content, request.content_type, request.source_url)
+    return _news_from_compact(fields, request.source_url)
+
 def parse_data(request: ParseRequest):
     """解析不同格式的新闻数据"""
     try:
@@ -34,9 +170,298 @@ def parse_data(request: ParseRequest):
     except Exception as e:
         return NewsData(source=request.source_url, url=request.source_url)
 
+def _decode(body: bytes, encoding: Optional[str] = None) -> str:
+    """按采集服务给出的编码只解码一次；未给出时按 BOM / <meta> 自行识别"""
+    if not encoding:
+        encoding, _ = charset.detect(None, body)
+    return charset.decode(body, encoding)
+
+def parse_bytes(body: bytes, content_type: str, source_url: str, encoding: Optional[str] = None) -> NewsData:
+    """解析原始字节"""
+    content = _decode(body, encoding)
+    return parse_data(ParseRequest(content=content, content_type=content_type, source_url=source_url))
+
+@app.post("/parse/raw", response_model=NewsData)
+async def parse_raw(request: Request, source_url: str, content_type: str = "html", encoding: Optional[str] = None):
+    """解析请求体中的原始页面字节（即采集服务 /collect/raw 的输出），编码通过 encoding 参数传入"""
+    body = await request.body()
+    fields = await _parse_and_learn(body, content_type, source_url, encoding)
+    return _news_from_compact(fields, source_url)
+
+# ===== HTML 解析后端 =====
+# PARSER_BACKEND=lxml（默认，需安装 lxml）：选择器预先编译为 (标签, class, id) 匹配条件，在 lxml 树上一次遍历同时求出正文与时间；
+# PARSER_BACKEND=bs4：原 BeautifulSoup + html.parser 实现。lxml 后端解析出错时自动回退到 bs4。
+# PARSER_SELECTIVE=1 时只构建候选子树：bs4 后端只创建 <title> 与候选元素（及其子树），丢弃其余元素、文本与 script/style/noscript；
+# lxml 后端改为不建树的事件解析，分块送入，字段都找到后停止。bs4 后端默认开启；lxml 后端默认关闭——
+# lxml 在 C 层建树很快，事件解析的 Python 回调反而更慢，只在需要压低单页内存时开启。
+CONTENT_SELECTORS = ['article', '.content', '.article-content', '#content', '.news-content']
+TIME_SELECTORS = ['time', '.publish-time', '.date', '.pub-time']
+GENERIC_SELECTORS = {"content": tuple(CONTENT_SELECTORS), "time": tuple(TIME_SELECTORS)}
+PARSER_BACKEND = os.getenv("PARSER_BACKEND", "lxml" if etree is not None else "bs4")
+PARSER_SELECTIVE = os.getenv("PARSER_SELECTIVE", "1" if PARSER_BACKEND == "bs4" else "0").lower() in ("1", "true", "yes")
+SELECTIVE_CHUNK_CHARS = int(os.getenv("PARSER_SELECTIVE_CHUNK_CHARS", "16384"))
+
+# get_text 同样不计入的元素文本
+_SKIP_TEXT_TAGS = frozenset(["script", "style", "template"])
+
+_SIMPLE_SELECTOR_RE = re.compile(r"^([a-zA-Z][\w-]*)?(?:\.([\w-]+))?(?:#([\w-]+))?$")
+
+def _compile_selector(selector: str) -> Optional[Tuple[Optional[str], Optional[str], Optional[str]]]:
+    """只支持简单选择器：tag / .class / #id / tag.class / tag#id；其他写法返回 None（lxml 后端不匹配，仅 bs4 后端生效）"""
+    match = _SIMPLE_SELECTOR_RE.match(selector.strip())
+    if match is None or not any(match.groups()):
+        return None
+    tag, class_name, element_id = match.groups()
+    return (tag.lower() if tag else None), class_name, element_id
+
+@lru_cache(maxsize=1024)
+def _compile_selectors(selectors: Tuple[str, ...]) -> List[Optional[tuple]]:
+    """按选择器元组缓存编译结果（通用列表与各站点模板各编译一次）"""
+    return [_compile_selector(s) for s in selectors]
+
+def _first_match(element, matchers, tag: str) -> Optional[int]:
+    """返回元素命中的优先级最高的选择器序号"""
+    classes = None
+    for index, matcher in enumerate(matchers):
+        if matcher is None:
+            continue
+        want_tag, want_class, want_id = matcher
+        if want_tag is not None and tag != want_tag:
+            continue
+        if want_class is not None:
+            if classes is None:
+                classes = (element.get("class") or "").split()
+            if want_class not in classes:
+                continue
+        if want_id is not None and element.get("id") != want_id:
+            continue
+        return index
+    return None
+
+def _text_content(element, separator: str = "") -> str:
+    """与 BeautifulSoup get_text(separator, strip=True) 一致：各文本节点去空白后拼接，跳过脚本、样式与注释"""
+    parts: List[str] = []
+    def walk(node):
+        if node.text and node.tag not in _SKIP_TEXT_TAGS:
+            text = node.text.strip()
+            if text:
+                parts.append(text)
+        for child in node:
+            if isinstance(child.tag, str) and child.tag not in _SKIP_TEXT_TAGS:
+                walk(child)
+            if child.tail:
+                tail = child.tail.strip()
+                if tail:
+                    parts.append(tail)
+    walk(element)
+    return separator.join(parts)
+
+def _selectors(template: Optional[dict]) -> Tuple[Tuple[str, ...], Tuple[str, ...]]:
+    """站点模板给出的 (正文, 时间) 选择器顺序；没有模板时为通用列表"""
+    if template:
+        return template["content"], template["time"]
+    return GENERIC_SELECTORS["content"], GENERIC_SELECTORS["time"]
+
+def _report_winners(winners: Optional[dict], content_selectors, content_hits, time_selectors, time_hits) -> None:
+    """把最终采用的正文、时间选择器写入 winners（未命中为 None），供站点模板学习"""
+    if winners is not None:
+        winners["content"] = content_selectors[min(content_hits)] if content_hits else None
+        winners["time"] = time_selectors[min(time_hits)] if time_hits else None
+
+def parse_html_lxml(content: str, source_url: str, template: Optional[dict] = None, winners: Optional[dict] = None) -> NewsData:
+    """lxml 后端：一次文档序遍历，记录每个选择器的首个命中，最高优先级的正文与时间都命中后提前结束"""
+    content_selectors, time_selectors = _selectors(template)
+    content_matchers = _compile_selectors(content_selectors)
+    time_matchers = _compile_selectors(time_selectors)
+    root = etree.fromstring(content, etree.HTMLParser())
+    if root is None:
+        _report_winners(winners, content_selectors, None, time_selectors, None)
+        return NewsData(source=source_url, url=source_url)
+    title_element = None
+    content_hits: Dict[int, Any] = {}
+    time_hits: Dict[int, Any] = {}
+    for element in root.iter(etree.Element):
+        tag = element.tag
+        if title_element is None and tag == "title":
+            title_element = element
+        index = _first_match(element, content_matchers, tag)
+        if index is not None and index not in content_hits:
+            content_hits[index] = element
+        index = _first_match(element, time_matchers, tag)
+        if index is not None and index not in time_hits:
+            time_hits[index] = element
+        if title_element is not None and 0 in content_hits and 0 in time_hits:
+            break
+
+    title = None
+    # 与 soup.title.string 一致：<title> 只有一个文本节点时取其文本
+    if title_element is not None and len(title_element) == 0:
+        title = title_element.text
+    content_text = _text_content(content_hits[min(content_hits)]) if content_hits else None
+    publish_time = _text_content(time_hits[min(time_hits)]) if time_hits else None
+    _report_winners(winners, content_selectors, content_hits, time_selectors, time_hits)
+    return NewsData(
+        title=title,
+        content=content_text,
+        publish_time=publish_time,
+        source=source_url,
+        url=source_url
+    )
+
+# 事件解析时整段丢弃的元素（不收集其中文本）
+_DROP_TAGS = frozenset(["script", "style", "noscript", "template"])
+
+class _SelectiveTarget:
+    """lxml 解析器的事件目标：不建树，只收集 <title> 与候选元素的文本；最高优先级的正文、时间都已闭合时 done 置位"""
+
+    def __init__(self, content_matchers, time_matchers):
+        self.matchers = (("content", content_matchers), ("time", time_matchers))
+        self.depth = 0
+        self.skip_depth = 0
+        self.buffer: List[str] = []
+        # 打开中的候选元素：[字段, 选择器序号, 深度, 文本片段]
+        self.captures: List[list] = []
+        self.seen = {"content": set(), "time": set()}
+        self.hits: Dict[str, Dict[int, str]] = {"content": {}, "time": {}}
+        self.title_depth = None
+        self.title_parts: List[str] = []
+        self.title_has_child = False
+        self.title_done = False
+        self.done = False
+
+    def _flush(self):
+        # 一个文本节点可能分多次 data() 送达，遇到标签或注释边界时才按节点去空白
+        if self.buffer:
+            text = "".join(self.buffer).strip()
+            self.buffer.clear()
+            if text:
+                for capture in self.captures:
+                    capture[3].append(text)
+
+    def start(self, tag, attrib):
+        self._flush()
+        self.depth += 1
+        if self.skip_depth:
+            self.skip_depth += 1
+            return
+        if tag in _DROP_TAGS:
+            self.skip_depth = 1
+            return
+        if self.title_depth is not None:
+            self.title_has_child = True
+        elif tag == "title" and not self.title_done:
+            self.title_depth = self.depth
+        for field, matchers in self.matchers:
+            index = _first_match(attrib, matchers, tag)
+            if index is not None and index not in self.seen[field]:
+                self.seen[field].add(index)
+                self.captures.append([field, index, self.depth, []])
+
+    def end(self, tag):
+        self._flush()
+        if self.skip_depth:
+            self.skip_depth -= 1
+        else:
+            while self.captures and self.captures[-1][2] == self.depth:
+                field, index, _, parts = self.captures.pop()
+                self.hits[field][index] = "".join(parts)
+            if self.title_depth == self.depth:
+                self.title_depth = None
+                self.title_done = True
+            self.done = self.title_done and 0 in self.hits["content"] and 0 in self.hits["time"]
+        self.depth -= 1
+
+    def data(self, text):
+        if self.skip_depth:
+            return
+        if self.title_depth is not None:
+            self.title_parts.append(text)
+        self.buffer.append(text)
+
+    def comment(self, text):
+        self._flush()
+
+    def close(self):
+        self._flush()
+        return self
+
+def parse_html_selective(content: str, source_url: str, template: Optional[dict] = None, winners: Optional[dict] = None) -> NewsData:
+    """lxml 事件解析：按块送入，标题与最高优先级的正文、时间都找到后不再解析剩余部分"""
+    content_selectors, time_selectors = _selectors(template)
+    target = _SelectiveTarget(_compile_selectors(content_selectors), _compile_selectors(time_selectors))
+    parser = etree.HTMLParser(target=target)
+    for start in range(0, len(content), SELECTIVE_CHUNK_CHARS):
+        parser.feed(content[start:start + SELECTIVE_CHUNK_CHARS])
+        if target.done:
+            break
+    parser.close()
+    title = None
+    if target.title_done and not target.title_has_child and target.title_parts:
+        title = "".join(target.title_parts)
+    content_hits, time_hits = target.hits["content"], target.hits["time"]
+    _report_winners(winners, content_selectors, content_hits, time_selectors, time_hits)
+    return NewsData(
+        title=title,
+        content=content_hits[min(content_hits)] if content_hits else None,
+        publish_time=time_hits[min(time_hits)] if time_hits else None,
+        source=source_url,
+        url=source_url
+    )
+
+if ElementFilter is not None:
+    class _CandidateFilter(ElementFilter):
+        """BeautifulSoup 的 parse_only 过滤器：只创建 <title> 与命中选择器的元素，候选之外的文本节点不创建"""
+
+        def __init__(self, content_matchers, time_matchers):
+            super().__init__()
+            self.content_matchers = content_matchers
+            self.time_matchers = time_matchers
+
+        def allow_tag_creation(self, nsprefix, name, attrs):
+            if name == "title":
+                return True
+            if name in _DROP_TAGS:
+                return False
+            attrs = attrs or {}
+            return (_first_match(attrs, self.content_matchers, name) is not None
+                    or _first_match(attrs, self.time_matchers, name) is not None)
+
+        def allow_string_creation(self, string):
+            return False
+
+def _parse_html_backend(content: str, source_url: str, template: Optional[dict] = None, winners: Optional[dict] = None) -> NewsData:
+    """按 PARSER_BACKEND 选择后端；lxml 后端解析出错时回退到 bs4"""
+    if PARSER_BACKEND == "lxml":
+        try:
+            if PARSER_SELECTIVE:
+                return parse_html_selective(content, source_url, template, winners)
+            return parse_html_lxml(content, source_url, template, winners)
+        except (ValueError, etree.LxmlError):
+            pass
+    return parse_html_bs4(content, source_url, template=template, winners=winners)
+
 def parse_html(content: str, source_url: str) -> NewsData:
-    """解析HTML格式的新闻"""
-    soup = BeautifulSoup(content, 'html.parser')
+    """解析HTML格式的新闻：按站点模板排列选择器，解析后记录命中情况"""
+    template = template_for(source_url)
+    winners: Dict[str, Optional[str]] = {}
+    started = time.perf_counter()
+    news = _parse_html_backend(content, source_url, template, winners)
+    record_template(source_url, template, winners, (time.perf_counter() - started) * 1000)
+    return news
+
+def parse_html_bs4(content: str, source_url: str, selective: Optional[bool] = None,
+                   template: Optional[dict] = None, winners: Optional[dict] = None) -> NewsData:
+    """BeautifulSoup 后端"""
+    content_selectors, time_selectors = _selectors(template)
+    content_matchers = _compile_selectors(content_selectors)
+    time_matchers = _compile_selectors(time_selectors)
+    if selective is None:
+        selective = PARSER_SELECTIVE
+    # 模板中有复杂 CSS 选择器时无法在建树前判断候选，改为完整建树
+    if selective and ElementFilter is not None and None not in content_matchers and None not in time_matchers:
+        soup = BeautifulSoup(content, 'html.parser', parse_only=_CandidateFilter(content_matchers, time_matchers))
+    else:
+        soup = BeautifulSoup(content, 'html.parser')
     
     # 提取标题
     title = None
@@ -45,23 +470,26 @@ def parse_html(content: str, source_url: str) -> NewsData:
     
     # 提取正文内容
     content_text = None
+    content_hits: Dict[int, Any] = {}
     # 尝试常见的正文选择器
-    content_selectors = ['article', '.content', '.article-content', '#content', '.news-content']
-    for selector in content_selectors:
+    for index, selector in enumerate(content_selectors):
         element = soup.select_one(selector)
         if element:
             content_text = element.get_text(strip=True)
+            content_hits[index] = element
             break
     
     # 提取发布时间
     publish_time = None
-    time_selectors = ['time', '.publish-time', '.date', '.pub-time']
-    for selector in time_selectors:
+    time_hits: Dict[int, Any] = {}
+    for index, selector in enumerate(time_selectors):
         element = soup.select_one(selector)
         if element:
             publish_time = element.get_text(strip=True)
+            time_hits[index] = element
             break
     
+    _report_winners(winners, content_selectors, content_hits, time_selectors, time_hits)
     return NewsData(
         title=title,
         content=content_text,
@@ -70,6 +498,110 @@ def parse_html(content: str, source_url: str) -> NewsData:
         url=source_url
     )
 
+# ===== 站点模板 =====
+# 同一站点的页面结构基本固定：按域名记住上次采用的正文、时间选择器，下次排在通用列表之前优先尝试
+# （lxml 后端命中即提前结束遍历，bs4 后端少做几次 select_one）；未命中时照常按通用列表回退，并改记新的选择器。
+# PARSER_TEMPLATES_PATH（默认 parser-service/templates.json）为手写覆盖，格式 {"域名": {"content": [...], "time": [...]}}，
+# 排在学习结果之前且不会被覆盖。GET /templates 导出各域名的模板、命中率与估算节省的解析时间。
+TEMPLATES_PATH = os.getenv("PARSER_TEMPLATES_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "templates.json"))
+TEMPLATE_MAX_DOMAINS = int(os.getenv("PARSER_TEMPLATE_MAX_DOMAINS", "1000"))
+TEMPLATE_FIELDS = ("content", "time")
+
+def _load_overrides() -> Dict[str, Dict[str, List[str]]]:
+    """读取手写覆盖；文件不存在或格式错误时视为没有覆盖"""
+    if not TEMPLATES_PATH or not os.path.exists(TEMPLATES_PATH):
+        return {}
+    try:
+        with open(TEMPLATES_PATH, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning("读取站点模板 %s 出错: %s", TEMPLATES_PATH, e)
+        return {}
+    overrides = {}
+    for domain, spec in data.items():
+        if isinstance(spec, dict):
+            overrides[domain.lower()] = {field: [s for s in spec.get(field) or [] if isinstance(s, str)] for field in TEMPLATE_FIELDS}
+    return overrides
+
+template_overrides = _load_overrides()
+# 学习到的选择器：{域名: {字段: 选择器}}；统计：{域名: {pages, hits, fallbacks, hit_ms, fallback_ms}}
+_learned: Dict[str, Dict[str, str]] = {}
+template_stats: Dict[str, Dict[str, float]] = {}
+
+def _domain(url: str) -> str:
+    return (urllib.parse.urlsplit(url).hostname or "").lower()
+
+def _preferred(domain: str, field: str) -> List[str]:
+    """某域名某字段优先尝试的选择器：手写覆盖在前，学习结果在后"""
+    preferred = list(template_overrides.get(domain, {}).get(field, []))
+    learned = _learned.get(domain, {}).get(field)
+    if learned and learned not in preferred:
+        preferred.append(learned)
+    return preferred
+
+def template_for(source_url: str) -> Optional[dict]:
+    """返回该 URL 所在域名的选择器顺序 {字段: 元组}；该域名还没有模板时返回 None（按通用列表解析）"""
+    domain = _domain(source_url)
+    if domain not in template_overrides and domain not in _learned:
+        return None
+    return {
+        field: tuple(dict.fromkeys(_preferred(domain, field) + list(GENERIC_SELECTORS[field])))
+        for field in TEMPLATE_FIELDS
+    }
+
+def record_template(source_url: str, template: Optional[dict], winners: dict, elapsed_ms: float) -> None:
+    """记录一次解析：有模板且各字段都由模板中的优先选择器取到计为命中，否则计为回退；再把本次采用的选择器记为该域名的模板"""
+    domain = _domain(source_url)
+    stats = template_stats.get(domain)
+    if stats is None:
+        if not domain or len(template_stats) >= TEMPLATE_MAX_DOMAINS:
+            return
+        stats = template_stats[domain] = {"pages": 0, "hits": 0, "fallbacks": 0, "hit_ms": 0.0, "fallback_ms": 0.0}
+    hit = template is not None
+    for field in TEMPLATE_FIELDS:
+        preferred = _preferred(domain, field)
+        if preferred and winners.get(field) not in preferred:
+            hit = False
+    outcome = "hit" if hit else "fallback"
+    stats["pages"] += 1
+    stats[outcome + "s"] += 1
+    stats[outcome + "_ms"] += elapsed_ms
+    overrides = template_overrides.get(domain, {})
+    for field in TEMPLATE_FIELDS:
+        winner = winners.get(field)
+        if winner and winner not in overrides.get(field, []):
+            _learned.setdefault(domain, {})[field] = winner
+
+@app.get("/templates")
+def get_templates():
+    """各域名的选择器模板与命中情况；saved_ms 按命中次数 ×（回退平均耗时 − 命中平均耗时）估算"""
+    domains = {}
+    for domain, stats in sorted(template_stats.items()):
+        hit_avg = stats["hit_ms"] / stats["hits"] if stats["hits"] else None
+        fallback_avg = stats["fallback_ms"] / stats["fallbacks"] if stats["fallbacks"] else None
+        saved_ms = 0.0
+        if hit_avg is not None and fallback_avg is not None:
+            saved_ms = stats["hits"] * max(fallback_avg - hit_avg, 0.0)
+        domains[domain] = {
+            "template": {field: _preferred(domain, field) for field in TEMPLATE_FIELDS},
+            "override": domain in template_overrides,
+            "pages": stats["pages"],
+            "hits": stats["hits"],
+            "fallbacks": stats["fallbacks"],
+            "hit_rate": round(stats["hits"] / stats["pages"], 4),
+            "avg_hit_ms": round(hit_avg, 3) if hit_avg is not None else None,
+            "avg_fallback_ms": round(fallback_avg, 3) if fallback_avg is not None else None,
+            "saved_ms": round(saved_ms, 3),
+        }
+    return {"overrides_path": TEMPLATES_PATH, "overrides": len(template_overrides), "domains": domains}
+
+@app.post("/templates/reload")
+def reload_templates():
+    """重新读取手写覆盖配置（学习到的模板保留）"""
+    global template_overrides
+    template_overrides = _load_overrides()
+    return {"overrides": len(template_overrides)}
+
 def parse_json(content: str, source_url: str) -> NewsData:
     """解析JSON格式的新闻数据"""
     try:
@@ -105,7 +637,7 @@ def parse_xml(content: str, source_url: str) -> NewsData:
     
     time_elem = soup.find('pubDate') or soup.find('publish_time') or soup.find('date')
     if time_elem:
-        publish_time = time_elem.text
+        publish_time = _feed_time(time_elem.text)
     
     author_elem = soup.find('author') or soup.find('creator')
     if author_elem:
@@ -120,6 +652,131 @@ def parse_xml(content: str, source_url: str) -> NewsData:
         url=source_url
     )
 
+# ===== 订阅源（RSS / Atom）=====
+# 一次解析返回订阅源中的全部条目。用 lxml iterparse 增量解析：每个 <item>/<entry> 结束时即产出一条并释放其子树，
+# 内存占用与条目数无关；不解析外部实体。
+FEED_ENTRY_TAGS = frozenset(["item", "entry"])
+FEED_MAX_ENTRIES = int(os.getenv("PARSER_FEED_MAX_ENTRIES", "200"))
+
+def _require_feed_parser() -> None:
+    """订阅源解析依赖 lxml；未安装时给出明确错误（HTTP 接口返回 501，进程内调用由网关按解析出错处理）"""
+    if etree is None:
+        raise RuntimeError("Feed parsing requires lxml")
+
+def _feed_time(value: Optional[str]) -> Optional[str]:
+    """RSS 的 pubDate（RFC 822，如 "Mon, 19 Oct 2026 08:00:00 +0800"）与 Atom 的 ISO 8601 时间统一为
+    清洗服务接受的 %Y-%m-%d %H:%M:%S；带时区的换算为本机时间。无法识别时原样返回"""
+    if not value:
+        return value
+    value = value.strip()
+    try:
+        parsed = parsedate_to_datetime(value)
+    except (TypeError, ValueError, IndexError):
+        try:
+            parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return value
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone().replace(tzinfo=None)
+    return parsed.strftime("%Y-%m-%d %H:%M:%S")
+
+def _localname(tag: str) -> str:
+    return tag.rpartition("}")[2]
+
+def _html_to_text(value: Optional[str]) -> Optional[str]:
+    """description / content:encoded 中常是转义后的 HTML 片段，取其文本"""
+    if not value or "<" not in value:
+        return value.strip() if value else value
+    root = etree.fromstring(value, etree.HTMLParser())
+    return _text_content(root, " ") if root is not None else None
+
+def _feed_entry(element, source_url: str) -> NewsData:
+    """从一个 RSS <item> 或 Atom <entry> 中提取字段；同一字段有多个来源时按列出顺序取第一个"""
+    fields: Dict[str, str] = {}
+    for child in element:
+        if not isinstance(child.tag, str):
+            continue
+        name = _localname(child.tag)
+        if name == "link":
+            # Atom 的 <link href rel> 只取正文链接；RSS 的 <link> 为文本
+            if child.get("href") is not None and child.get("rel", "alternate") == "alternate":
+                fields.setdefault("link", child.get("href"))
+            elif child.text:
+                fields.setdefault("link", child.text.strip())
+        elif name == "author":
+            # Atom 的 <author><name>…</name></author>
+            fields.setdefault("author", _text_content(child, " "))
+        elif child.text:
+            fields.setdefault(name, child.text)
+    url = fields.get("link") or fields.get("guid") or fields.get("id") or source_url
+    content = fields.get("encoded") or fields.get("content") or fields.get("description") or fields.get("summary")
+    publish_time = fields.get("pubDate") or fields.get("published") or fields.get("date") or fields.get("updated")
+    title = fields.get("title")
+    return NewsData(
+        title=title.strip() if title else None,
+        content=_html_to_text(content),
+        publish_time=_feed_time(publish_time),
+        author=fields.get("author") or fields.get("creator"),
+        source=source_url,
+        url=url.strip()
+    )
+
+def iter_feed_entries(body: bytes, source_url: str, encoding: Optional[str] = None) -> Iterator[NewsData]:
+    """增量解析订阅源，逐条产出；最多 PARSER_FEED_MAX_ENTRIES 条"""
+    # 文档自带 XML 声明或 BOM 时由 libxml2 自行识别；只在采集方给出非 UTF 编码时覆盖
+    override = encoding if encoding and not encoding.lower().startswith("utf") else None
+    context = etree.iterparse(io.BytesIO(body), events=("end",), encoding=override, recover=True,
+                              resolve_entities=False, no_network=True, huge_tree=False)
+    count = 0
+    for _, element in context:
+        if not isinstance(element.tag, str) or _localname(element.tag) not in FEED_ENTRY_TAGS:
+            continue
+        yield _feed_entry(element, source_url)
+        count += 1
+        if count >= FEED_MAX_ENTRIES:
+            return
+        element.clear(keep_tail=True)
+        while element.getprevious() is not None:
+            del element.getparent()[0]
+
+def parse_feed_bytes(body: bytes, source_url: str, encoding: Optional[str] = None) -> List[dict]:
+    _require_feed_parser()
+    try:
+        return [entry.dict() for entry in iter_feed_entries(body, source_url, encoding)]
+    except etree.LxmlError:
+        return []
+
+@app.post("/parse/feed")
+async def parse_feed(request: Request, source_url: str, encoding: Optional[str] = None, stream: bool = False):
+    """订阅源模式：请求体为 RSS/Atom 原始字节，返回全部条目（每条的 url 为条目链接）。
+
+    stream=true 时按解析进度以 NDJSON 逐条返回，否则返回 {"source", "count", "entries"}。
+    """
+    if etree is None:
+        raise HTTPException(status_code=501, detail="Feed parsing requires lxml")
+    body = await request.body()
+    if stream:
+        def lines():
+            try:
+                for entry in iter_feed_entries(body, source_url, encoding):
+                    yield json.dumps(entry.dict(), ensure_ascii=False) + "\n"
+            except etree.LxmlError:
+                return
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+    entries = [_news_from_compact(fields, source_url).dict() for fields in await _execute(_feed_compact, body, source_url, encoding)]
+    return {"source": source_url, "count": len(entries), "entries": entries}
+
+@app.get("/health")
+def health_check():
+    """健康检查"""
+    return {
+        "status": "healthy",
+        "service": "parser",
+        "backend": PARSER_BACKEND,
+        "execution": {"mode": PARSER_EXECUTION, "workers": PARSER_WORKERS if _executor else 0, "pending": _pending, "max_pending": PARSER_MAX_PENDING, "rejected": _rejected},
+        "timestamp": datetime.now().isoformat(),
+    }
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8002)
\ No newline at end of file
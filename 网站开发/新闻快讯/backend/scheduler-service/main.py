@@ -11,6 +11,8 @@ current_dir = os.path.dirname(os.path.abspath(__file__))
 feeds_path = os.path.join(current_dir, '..', 'collector-service', 'feeds.yml')
 
 API_GATEWAY_URL = "http://localhost:8000"
+# 批量请求的超时（秒），略长于网关的批量处理时限 GATEWAY_BATCH_DEADLINE_SECONDS（默认 300 秒）
+BATCH_TIMEOUT_SECONDS = float(os.getenv("SCHEDULER_BATCH_TIMEOUT_SECONDS", "330"))
 
 def load_feeds():
     """从 feeds.yml 加载新闻源配置"""
@@ -21,35 +23,59 @@ def load_feeds():
         print(f"加载 feeds.yml 时出错: {e}")
         return {'feeds': []}
 
-def trigger_collection(feed_name, url):
-    """触发 API Gateway 的新闻采集流程"""
-    print(f"正在触发采集: {feed_name} ({url})")
+# 每个新闻源的累计采集次数与“页面未变化”次数
+feed_stats = {}
+
+def report_unchanged_rates(feeds, results):
+    """累计并打印各新闻源的未变化命中率"""
+    by_url = {r.get("url"): r for r in results}
+    for name, url in feeds:
+        r = by_url.get(url)
+        if not r or not r.get("success"):
+            continue
+        stats = feed_stats.setdefault(name, {"runs": 0, "unchanged": 0})
+        stats["runs"] += 1
+        stats["unchanged"] += 1 if r.get("unchanged") else 0
+        print(f"  {name}: 未变化命中率 {stats['unchanged']}/{stats['runs']} ({stats['unchanged'] / stats['runs']:.0%})")
+
+def trigger_batch_collection(feeds):
+    """同一频率的多个新闻源合并为一次 API Gateway 批量处理请求"""
+    names = ", ".join(name for name, _ in feeds)
+    print(f"正在批量触发采集: {names}")
     try:
-        response = requests.post(f"{API_GATEWAY_URL}/process-news", json={"url": url})
+        response = requests.post(
+            f"{API_GATEWAY_URL}/process-news/batch",
+            json={"urls": [url for _, url in feeds]},
+            timeout=BATCH_TIMEOUT_SECONDS,
+        )
         if response.status_code == 200:
-            print(f"成功触发采集: {feed_name}")
+            result = response.json()
+            print(f"批量采集完成: 成功 {result.get('succeeded')}/{result.get('total')}，未变化 {result.get('unchanged', 0)}，入库 {result.get('saved')} 条")
+            report_unchanged_rates(feeds, result.get("results", []))
         else:
-            print(f"采集失败 {feed_name}: {response.status_code} - {response.text}")
+            print(f"批量采集失败 ({names}): {response.status_code} - {response.text}")
     except requests.exceptions.RequestException as e:
         print(f"请求 API Gateway 时出错: {e}")
 
 def schedule_jobs():
-    """根据 feeds.yml 的配置安排采集任务"""
+    """根据 feeds.yml 的配置安排采集任务：同一频率的新闻源合并为一个批量任务"""
     feeds = load_feeds()
     if not feeds:
         print("无法加载 feeds.yml，调度服务终止")
         return
     
+    groups = {}
     for feed in feeds:
         feed_name = feed.get('name')
         url = feed.get('url')
         frequency = feed.get('frequency_minutes', 60)
         
         if feed_name and url and frequency:
-            schedule.every(frequency).minutes.do(
-                trigger_collection, feed_name=feed_name, url=url
-            )
-            print(f"已安排：{feed_name} 每 {frequency} 分钟采集一次")
+            groups.setdefault(frequency, []).append((feed_name, url))
+    
+    for frequency, group in groups.items():
+        schedule.every(frequency).minutes.do(trigger_batch_collection, feeds=group)
+        print(f"已安排：{', '.join(name for name, _ in group)} 每 {frequency} 分钟批量采集一次")
 
 def main():
     print("调度服务启动...")
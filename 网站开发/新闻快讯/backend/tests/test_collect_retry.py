@@ -0,0 +1,88 @@
+"""入库失败后重试：采集服务的校验信息在入库成功前不生效，重试时页面仍按"已变化"完整处理。
+
+运行：cd backend && python -m pytest -q tests
+"""
+import asyncio
+import importlib.util
+import os
+import sys
+
+import httpx
+import pytest
+from fastapi import HTTPException
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PAGE_URL = "http://news.example.com/article/1"
+PAGE_HTML = """<html><head><title>测试新闻标题</title></head><body>
+<article><h1>测试新闻标题</h1><p class="time">2026-10-19 08:00:00</p>
+<p>记者从有关部门获悉，今年以来各地持续推进重点项目建设，投资规模稳步扩大。</p>
+<p>专家表示，新型储能与算力基础设施将成为下一阶段的投资热点。</p></article>
+</body></html>""".encode("utf-8")
+
+def _load_gateway():
+    os.environ["GATEWAY_PIPELINE_MODE"] = "inprocess"
+    path = os.path.join(BACKEND_DIR, "api-gateway", "main.py")
+    sys.path.insert(0, os.path.dirname(path))
+    spec = importlib.util.spec_from_file_location("_test_api_gateway", path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return module
+
+@pytest.fixture()
+def gateway():
+    gw = _load_gateway()
+    collector = gw.pipeline._load("collector-service")
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(200, content=PAGE_HTML, headers={"content-type": "text/html; charset=utf-8", "etag": '"v1"'})
+
+    collector._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    collector._validators.clear()
+    collector._pending_validators.clear()
+    yield gw, collector
+    gw._shutdown_pipeline_executor()
+
+def _run_batch(gw):
+    return asyncio.run(gw.process_news_batch(gw.BatchCollectRequest(urls=[PAGE_URL])))
+
+def test_failed_save_is_retried_until_it_succeeds(gateway, monkeypatch):
+    gw, collector = gateway
+    saved = []
+
+    async def failing_save(items):
+        raise HTTPException(status_code=503, detail="news-service unavailable")
+
+    async def working_save(items):
+        saved.extend(items)
+        return items
+
+    # 第一次入库失败：校验信息不生效
+    monkeypatch.setattr(gw, "save_items", failing_save)
+    first = _run_batch(gw)
+    assert first["save_error"]
+    assert first["results"][0]["unchanged"] is False
+    assert PAGE_URL not in collector._validators
+
+    # 重试：页面内容未变，但上次没有入库，仍需完整处理并入库
+    monkeypatch.setattr(gw, "save_items", working_save)
+    second = _run_batch(gw)
+    assert second["save_error"] is None
+    assert second["results"][0]["unchanged"] is False
+    assert second["results"][0]["saved"] is True
+    assert [item["url"] for item in saved] == [PAGE_URL]
+    assert PAGE_URL in collector._validators
+
+    # 入库成功后才按未变化跳过
+    third = _run_batch(gw)
+    assert third["results"][0]["unchanged"] is True
+
+def test_commit_ignores_stale_digest(gateway):
+    _, collector = gateway
+    result = asyncio.run(collector.fetch(PAGE_URL, decode=False, commit=False))
+    assert not collector.commit_validator(PAGE_URL, "0" * 32)
+    assert PAGE_URL not in collector._validators
+    assert collector.commit_validator(PAGE_URL, result["digest"])
+    assert asyncio.run(collector.fetch(PAGE_URL, decode=False))["unchanged"] is True
@@ -0,0 +1,64 @@
+"""网关的长耗时写入型路由：/news/import/* 等走专用路由，使用单独的读超时，不重试、不计入熔断器。
+
+运行：cd backend && python -m pytest -q tests
+"""
+import importlib.util
+import os
+import sys
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+class _Body(httpx.AsyncByteStream):
+    """未预读的响应体：网关直通代理按原始字节流转发，MockTransport 的 content= 响应已被读完，不能再流式读取"""
+    async def __aiter__(self):
+        yield b'{"detail": "upstream timeout"}'
+
+def _load_gateway():
+    path = os.path.join(BACKEND_DIR, "api-gateway", "main.py")
+    sys.path.insert(0, os.path.dirname(path))
+    spec = importlib.util.spec_from_file_location("_test_api_gateway_routes", path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return module
+
+@pytest.fixture()
+def gateway(monkeypatch):
+    monkeypatch.setenv("GATEWAY_RETRY_ATTEMPTS", "2")
+    monkeypatch.setenv("GATEWAY_RETRY_BASE_DELAY", "0")
+    monkeypatch.setenv("GATEWAY_BREAKER_FAILURES", "3")
+    monkeypatch.delenv("GATEWAY_NEWS_IMPORT_TIMEOUT", raising=False)
+    gw = _load_gateway()
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append((request.method, request.url.path, request.extensions.get("timeout", {})))
+        # 模拟下游慢导入超时后的 504：普通 GET 会重试并计入熔断器
+        return httpx.Response(504, headers={"content-type": "application/json"}, stream=_Body())
+
+    with TestClient(gw.app) as client:
+        gw.service_clients["news"] = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        yield gw, client, calls
+
+def test_import_uses_route_timeout_without_retries(gateway):
+    gw, client, calls = gateway
+    response = client.get("/news/import/google_news")
+    assert response.status_code == 504
+    assert [(method, path) for method, path, _ in calls] == [("GET", "/import/google_news")]
+    assert calls[0][2]["read"] == 300.0
+    assert gw.resilience_stats["news"]["retries"] == 0
+    # 连续失败超过熔断阈值也不打开熔断器
+    for _ in range(gw.BREAKER_FAILURE_THRESHOLD):
+        client.get("/news/import/google_news")
+    assert len(calls) == 1 + gw.BREAKER_FAILURE_THRESHOLD
+    assert gw._breaker("news").state == "closed"
+
+def test_regular_read_is_retried(gateway):
+    gw, client, calls = gateway
+    client.get("/news/stats")
+    assert len(calls) == 1 + gw.RETRY_ATTEMPTS
+    assert all(path == "/stats" for _, path, _ in calls)